@@ -0,0 +1,182 @@
+"""Пропускная способность WSGI и ASGI под параллельной нагрузкой.
+
+Оба варианта запускаются локально с одинаковым пулом из ASGI_THREADS
+потоков: WSGI-сервер отдаёт каждое соединение потоку целиком, ASGI
+(core.asgi.WsgiToAsgi за минимальным asyncio-сервером) занимает поток
+только на время работы view. Замеры идут без помех и при «медленных»
+клиентах, которые держат соединение, не дописав заголовки.
+
+Запуск из каталога с manage.py: python -m benchmarks.asgi
+"""
+import asyncio
+import http.client
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+from benchmarks.pages import seed
+from benchmarks.utils import setup
+
+setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.wsgi import get_wsgi_application  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from core.asgi import WsgiToAsgi  # noqa: E402
+
+CLIENTS = 16
+REQUESTS = 20
+SLOW_CLIENTS = settings.ASGI_THREADS
+SLOW_SECONDS = 2
+URLS = ('/', '/group/group/', '/profile/author/')
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class PooledWSGIServer(WSGIServer):
+    """WSGI-сервер с фиксированным пулом потоков, как у gthread-воркера."""
+
+    def __init__(self, *args, threads, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = ThreadPoolExecutor(max_workers=threads)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    process_request_thread = socketserver.ThreadingMixIn.process_request_thread
+
+
+def start_wsgi():
+    server = PooledWSGIServer(
+        ('127.0.0.1', 0), QuietHandler, threads=settings.ASGI_THREADS)
+    server.set_app(get_wsgi_application())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.server_address[1]
+
+
+async def read_request(reader):
+    """Строка запроса и заголовки; ValueError, если клиент ушёл."""
+    request_line = await reader.readline()
+    method, target, _ = request_line.decode('latin-1').split(' ', 2)
+    headers = []
+    while True:
+        line = await reader.readline()
+        if line == b'\r\n':
+            return method, target, headers
+        if not line:
+            raise ValueError('Клиент ушёл, не дописав запрос')
+        name, value = line.decode('latin-1').split(':', 1)
+        headers.append((name.strip().lower().encode('latin-1'),
+                        value.strip().encode('latin-1')))
+
+
+async def handle_asgi(app, reader, writer):
+    """Разбирает один HTTP/1.1-запрос и передаёт его ASGI-приложению."""
+    try:
+        method, target, headers = await read_request(reader)
+    except ValueError:
+        writer.close()
+        return
+    path, _, query = target.partition('?')
+    scope = {
+        'type': 'http', 'http_version': '1.1', 'method': method,
+        'path': path, 'query_string': query.encode('latin-1'),
+        'headers': headers, 'server': ('127.0.0.1', 80),
+        'client': writer.get_extra_info('peername'),
+    }
+
+    requested = []
+
+    async def receive():
+        if not requested:
+            requested.append(True)
+            return {'type': 'http.request', 'body': b''}
+        # Тело уже прочитано: дальше ждём только закрытия соединения
+        await reader.read()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            lines = [f'HTTP/1.1 {message["status"]} -'.encode()]
+            lines += [name + b': ' + value
+                      for name, value in message['headers']]
+            lines += [b'Connection: close', b'', b'']
+            writer.write(b'\r\n'.join(lines))
+        else:
+            writer.write(message.get('body', b''))
+            await writer.drain()
+
+    try:
+        await app(scope, receive, send)
+    except ConnectionError:
+        pass
+    writer.close()
+
+
+def start_asgi():
+    app = WsgiToAsgi(get_wsgi_application())
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(asyncio.start_server(
+        lambda reader, writer: handle_asgi(app, reader, writer),
+        '127.0.0.1', 0))
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return server.sockets[0].getsockname()[1]
+
+
+def hold_slow_clients(port):
+    """Открывает соединения, которые не дописывают запрос SLOW_SECONDS."""
+    sockets = []
+    for _ in range(SLOW_CLIENTS):
+        sock = socket.create_connection(('127.0.0.1', port))
+        sock.sendall(b'GET / HTTP/1.1\r\nHost: localhost\r\n')
+        sockets.append(sock)
+
+    def release():
+        time.sleep(SLOW_SECONDS)
+        for sock in sockets:
+            sock.close()
+
+    threading.Thread(target=release, daemon=True).start()
+
+
+def load(port):
+    def client(number):
+        for request in range(REQUESTS):
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            conn.request('GET', URLS[(number + request) % len(URLS)])
+            response = conn.getresponse()
+            response.read()
+            assert response.status == 200, response.status
+            conn.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CLIENTS) as clients:
+        list(clients.map(client, range(CLIENTS)))
+    return CLIENTS * REQUESTS / (time.perf_counter() - start)
+
+
+def main():
+    setup_test_environment()
+    settings.ALLOWED_HOSTS = ['*']
+    connection.creation.create_test_db(verbosity=0)
+    seed()
+    for name, start in (('WSGI', start_wsgi), ('ASGI', start_asgi)):
+        port = start()
+        load(port)
+        print(f'{name}: {load(port):8.1f} запросов/с')
+        hold_slow_clients(port)
+        print(f'{name} при {SLOW_CLIENTS} медленных клиентах: '
+              f'{load(port):8.1f} запросов/с')
+        time.sleep(SLOW_SECONDS)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Затраты процессора на сжатие ленты и сэкономленные байты.
+
+Для страниц index, profile и follow_index сравниваются уровни gzip
+и, если установлен пакет brotli, качество brotli.
+Запуск из каталога с manage.py: python -m benchmarks.compression
+"""
+import gzip
+
+from benchmarks.utils import measure, setup
+
+setup()
+
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from benchmarks.pages import seed  # noqa: E402
+from posts.models import Follow, User  # noqa: E402
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+NUMBER = 50
+
+
+def codecs():
+    for level in (1, 6, 9):
+        yield f'gzip {level}', (
+            lambda data, level=level: gzip.compress(data, level, mtime=0))
+    if brotli is not None:
+        for quality in (1, 4, 11):
+            yield f'brotli {quality}', (
+                lambda data, quality=quality: brotli.compress(
+                    data, quality=quality))
+
+
+def main():
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+    seed()
+    reader = User.objects.create_user(username='reader')
+    Follow.objects.create(
+        user=reader, author=User.objects.get(username='author'))
+    client = Client()
+    client.force_login(reader)
+    for url in ('/', '/profile/author/', '/follow/'):
+        html = client.get(url).content
+        print(f'== {url}: {len(html)} байт')
+        for name, compress in codecs():
+            size = len(compress(html))
+            seconds = measure(lambda: compress(html), NUMBER)
+            print(
+                f'{name:<12} {seconds * 1e6:8.0f} мкс '
+                f'{size:8d} байт  -{100 - size * 100 / len(html):.0f}%'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Полная загрузка постов ленты против Post.objects.for_feed().
+
+Для страниц из 10 и 100 постов выводятся время запроса, пиковая память
+на построение объектов и объём данных, полученных из базы.
+Запуск из каталога с manage.py: python -m benchmarks.feed_projection
+"""
+import tracemalloc
+
+from benchmarks.utils import measure, setup
+
+setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from benchmarks.pages import seed  # noqa: E402
+from posts.models import Post  # noqa: E402
+
+NUMBER = 200
+
+
+def transferred(queryset):
+    """Суммарный размер значений, которые вернула база."""
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return sum(
+            len(str(value).encode()) for row in cursor.fetchall()
+            for value in row if value is not None
+        )
+
+
+def peak_memory(queryset):
+    tracemalloc.start()
+    list(queryset.all())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+    seed()
+    for size in (10, 100):
+        print(f'== {size} постов')
+        for name, queryset in (
+            ('все столбцы', Post.objects.select_related('author', 'group')),
+            ('for_feed()', Post.objects.for_feed()),
+        ):
+            page = queryset[:size]
+            seconds = measure(lambda: list(page.all()), NUMBER)
+            print(
+                f'{name:<12} {seconds * 1e6:8.0f} мкс '
+                f'{peak_memory(page) / 1024:8.1f} КБ памяти '
+                f'{transferred(page) / 1024:8.1f} КБ из базы'
+            )
+
+
+if __name__ == '__main__':
+    main()
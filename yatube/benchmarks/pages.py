@@ -0,0 +1,55 @@
+"""Время ответа основных страниц на заполненной базе в памяти.
+
+Запуск из каталога с manage.py: python -m benchmarks.pages
+Профиль настроек задаётся переменной YATUBE_ENV, см. benchmarks.profiles.
+"""
+import tracemalloc
+
+from benchmarks.utils import measure, report, setup
+
+setup()
+
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from posts.models import Group, Post, User  # noqa: E402
+
+NUMBER = 200
+POSTS = 1000
+
+
+def seed():
+    author = User.objects.create_user(username='author')
+    group = Group.objects.create(
+        title='Группа', slug='group', description='Описание')
+    posts = [
+        Post(text='Текст поста ' * 20, author=author, group=group)
+        for _ in range(POSTS)
+    ]
+    for post in posts:
+        post.render_text()
+    Post.objects.bulk_create(posts)
+    return Post.objects.first()
+
+
+def main():
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+    post = seed()
+    client = Client()
+    tracemalloc.start()
+    for url in (
+        '/',
+        '/?page=50',
+        '/group/group/',
+        '/profile/author/',
+        f'/posts/{post.id}/',
+    ):
+        report(url, measure(lambda: client.get(url), NUMBER))
+    current, _ = tracemalloc.get_traced_memory()
+    print(f'Память, удерживаемая после запросов: {current / 1024:.0f} КБ')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""Прогон benchmarks.pages для профилей настроек dev и prod.
+
+Для prod статика предварительно собирается во временный STATIC_ROOT;
+если исходников статики нет, prod запускается без манифеста.
+
+Запуск из каталога с manage.py: python -m benchmarks.profiles
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+
+def main():
+    for profile in ('dev', 'prod'):
+        print(f'== YATUBE_ENV={profile}')
+        with tempfile.TemporaryDirectory() as temp_dir:
+            env = dict(
+                os.environ,
+                YATUBE_ENV=profile,
+                SECRET_KEY='benchmark',
+                YATUBE_CACHE_DIR=os.path.join(temp_dir, 'cache'),
+                YATUBE_STATIC_ROOT=os.path.join(temp_dir, 'static'),
+            )
+            if profile == 'prod' and not os.path.isdir('static'):
+                env['YATUBE_STATIC_MANIFEST'] = '0'
+            elif profile == 'prod':
+                subprocess.run(
+                    [sys.executable, 'manage.py', 'collectstatic',
+                     '--noinput', '-v', '0'],
+                    env=env, check=True,
+                )
+            subprocess.run(
+                [sys.executable, '-m', 'benchmarks.pages'],
+                env=env, check=True,
+            )
+
+
+if __name__ == '__main__':
+    main()
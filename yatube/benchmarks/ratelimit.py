@@ -0,0 +1,35 @@
+"""Накладные расходы декоратора ratelimit.
+
+Запуск из каталога с manage.py: python -m benchmarks.ratelimit
+"""
+from benchmarks.utils import measure, report, setup
+
+setup()
+
+from django.contrib.auth.models import AnonymousUser  # noqa: E402
+from django.http import HttpResponse  # noqa: E402
+from django.test import RequestFactory, override_settings  # noqa: E402
+
+from core.ratelimit import ratelimit  # noqa: E402
+
+NUMBER = 20000
+
+
+def view(request):
+    return HttpResponse()
+
+
+@override_settings(RATELIMITS={'bench': (10 ** 9, 1)})
+def main():
+    request = RequestFactory().post('/')
+    request.user = AnonymousUser()
+    limited = ratelimit('bench')(view)
+    plain = measure(lambda: view(request), NUMBER)
+    decorated = measure(lambda: limited(request), NUMBER)
+    report('view без ограничения', plain)
+    report('view с ratelimit', decorated)
+    report('накладные расходы', decorated - plain)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Стоимость рендера posts/index.html с 10 статьями.
+
+Сравнивает загрузку шаблонов без кеша и через cached.Loader, а также
+цикл с {% include 'includes/article.html' %} и с встроенной разметкой
+статьи: include разрешается один раз за рендер, и на каждой статье
+остаётся только push контекста — несколько процентов от рендера.
+Запуск из каталога с manage.py: python -m benchmarks.templates
+"""
+import os
+
+from benchmarks.utils import measure, report, setup
+
+setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import AnonymousUser  # noqa: E402
+from django.core.paginator import Paginator  # noqa: E402
+from django.template.backends.django import DjangoTemplates  # noqa: E402
+from django.test import RequestFactory, override_settings  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from posts.models import Group, Post, User  # noqa: E402
+
+NUMBER = 300
+LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+def backend(loaders):
+    options = dict(settings.TEMPLATES[0]['OPTIONS'], loaders=loaders)
+    return DjangoTemplates({
+        'NAME': 'bench',
+        'DIRS': settings.TEMPLATES[0]['DIRS'],
+        'APP_DIRS': False,
+        'OPTIONS': options,
+    })
+
+
+def inlined(engine):
+    directory = settings.TEMPLATES[0]['DIRS'][0]
+    with open(os.path.join(directory, 'posts/index.html')) as index:
+        source = index.read()
+    with open(os.path.join(directory, 'includes/article.html')) as article:
+        markup = article.read().replace('{% load thumbnail %}', '')
+    return engine.from_string(
+        source.replace("{% include 'includes/article.html' %}", markup))
+
+
+def posts(count):
+    group = Group(id=1, title='Группа', slug='group')
+    author = User(
+        id=1, username='author', first_name='Лев', last_name='Толстой')
+    posts = [
+        Post(
+            id=number, text='Текст поста ' * 20, author=author,
+            group=group, pub_date=timezone.now(),
+        )
+        for number in range(1, count + 1)
+    ]
+    for post in posts:
+        post.render_text()
+    return posts
+
+
+# Фрагментный кеш иначе спрячет стоимость цикла по статьям
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+def main():
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    context = {
+        'title': 'Главная страница',
+        'text': 'Последние обновления на сайте',
+        'page_obj': Paginator(posts(10), 10).get_page(1),
+    }
+    cached = [('django.template.loaders.cached.Loader', LOADERS)]
+    for name, loaders in (
+        ('без кеша шаблонов', LOADERS),
+        ('cached.Loader', cached),
+    ):
+        engine = backend(loaders)
+        report(name, measure(
+            lambda: engine.get_template('posts/index.html').render(
+                context, request),
+            NUMBER,
+        ))
+    template = inlined(backend(cached))
+    report('cached.Loader, статья без include', measure(
+        lambda: template.render(context, request), NUMBER))
+
+
+if __name__ == '__main__':
+    main()
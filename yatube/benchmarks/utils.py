@@ -0,0 +1,22 @@
+import os
+import time
+
+import django
+
+
+def setup():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    django.setup()
+
+
+def measure(func, number):
+    """Среднее время одного вызова func в секундах."""
+    func()
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    return (time.perf_counter() - start) / number
+
+
+def report(name, seconds):
+    print(f'{name:<40} {seconds * 1e6:10.1f} мкс')
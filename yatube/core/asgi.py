@@ -0,0 +1,164 @@
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+
+class WsgiToAsgi:
+    """ASGI-приложение поверх WSGI-обработчика Django.
+
+    Django 2.2 не умеет асинхронные view, поэтому запрос целиком
+    обрабатывается в пуле из ASGI_THREADS потоков. Выигрыш в том, что
+    поток занят только на время работы view: чтение тела запроса,
+    медленные клиенты и простаивающие соединения обслуживает цикл
+    событий. Потоковые ответы читаются по одному куску в отдельном пуле
+    из ASGI_STREAM_THREADS потоков: долгие потоки не занимают потоки
+    view, а при отключении клиента их чтение прекращается.
+    """
+
+    def __init__(self, wsgi_application, threads=None, stream_threads=None):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            max_workers=threads or settings.ASGI_THREADS,
+            thread_name_prefix='asgi',
+        )
+        self.stream_executor = ThreadPoolExecutor(
+            max_workers=stream_threads or settings.ASGI_STREAM_THREADS,
+            thread_name_prefix='asgi-stream',
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.http(scope, receive, send)
+        else:
+            raise ValueError(f'Неподдерживаемый тип соединения: '
+                             f'{scope["type"]}')
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                self.stream_executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, receive):
+        body = io.BytesIO()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            body.write(message.get('body', b''))
+            if not message.get('more_body'):
+                body.seek(0)
+                return body
+
+    async def wait_disconnect(self, receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    def environ(self, scope, body):
+        server_name, server_port = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', ''),
+            'PATH_INFO': scope['path'],
+            'QUERY_STRING': scope['query_string'].decode('latin-1'),
+            'SERVER_NAME': server_name,
+            'SERVER_PORT': str(server_port),
+            'SERVER_PROTOCOL': 'HTTP/' + scope.get('http_version', '1.1'),
+            'REMOTE_ADDR': client[0],
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+            # Потоковые ответы читаются в своём пуле, а не потоками view
+            'yatube.stream_pool': True,
+        }
+        for name, value in scope['headers']:
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                environ[name] = value
+                continue
+            key = 'HTTP_' + name
+            if key in environ:
+                value = environ[key] + ',' + value
+            environ[key] = value
+        return environ
+
+    def run(self, environ):
+        """Вызывает WSGI-приложение; выполняется в потоке пула."""
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers
+            ]
+
+        result = self.wsgi_application(environ, start_response)
+        if getattr(result, 'streaming', False):
+            return started, result
+        # Обычный ответ собирается и закрывается в том же потоке, что и
+        # view: сигнал request_finished закрывает соединения этого потока
+        try:
+            return started, b''.join(result)
+        finally:
+            result.close()
+
+    async def http(self, scope, receive, send):
+        body = await self.read_body(receive)
+        if body is None:
+            return
+        loop = asyncio.get_running_loop()
+        started, result = await loop.run_in_executor(
+            self.executor, self.run, self.environ(scope, body))
+        await send({
+            'type': 'http.response.start',
+            'status': started['status'],
+            'headers': started['headers'],
+        })
+        if isinstance(result, bytes):
+            await send({'type': 'http.response.body', 'body': result})
+            return
+        await self.stream(result, receive, send)
+
+    async def stream(self, result, receive, send):
+        """Отдаёт потоковый ответ, пока клиент не отключится."""
+        loop = asyncio.get_running_loop()
+        disconnected = asyncio.ensure_future(self.wait_disconnect(receive))
+        chunks = iter(result)
+        try:
+            while not disconnected.done():
+                chunk = await loop.run_in_executor(
+                    self.stream_executor, next, chunks, None)
+                if chunk is None:
+                    await send({'type': 'http.response.body', 'body': b''})
+                    break
+                if chunk and not disconnected.done():
+                    await send({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+        finally:
+            disconnected.cancel()
+            await loop.run_in_executor(self.stream_executor, result.close)
+
+
+def get_asgi_application():
+    from django.core.wsgi import get_wsgi_application
+    return WsgiToAsgi(get_wsgi_application())
@@ -0,0 +1,152 @@
+import fcntl
+import hashlib
+import math
+import os
+import random
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+LOCK_KEY = 'lock:{}'
+GENERATION_KEY = 'generation:{}'
+# Пауза между проверками, пока значение считает другой процесс
+POLL_INTERVAL = 0.05
+
+
+@contextmanager
+def mutex(key):
+    """Блокировка ключа, общая для всех процессов на сервере.
+
+    Операции кеша вроде add() и incr() атомарны не во всех бэкендах:
+    у FileBasedCache это отдельные чтение и запись. Поэтому изменения
+    «прочитать и записать» делаются под flock на одном из
+    CACHE_LOCK_STRIPES файлов в CACHE_LOCK_DIR. Между серверами такая
+    блокировка не действует: там нужен бэкенд с атомарными операциями.
+    """
+    stripe = int(hashlib.sha1(key.encode()).hexdigest(), 16) % (
+        settings.CACHE_LOCK_STRIPES)
+    os.makedirs(settings.CACHE_LOCK_DIR, exist_ok=True)
+    with open(os.path.join(settings.CACHE_LOCK_DIR, f'{stripe}.lock'),
+              'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def add(key, value, timeout):
+    """Атомарный cache.add: True, если ключа не было."""
+    with mutex(key):
+        if cache.get(key) is not None:
+            return False
+        cache.set(key, value, timeout)
+        return True
+
+
+def _timeouts(timeout):
+    """Срок свежести и срок хранения: устаревшее значение живёт дольше."""
+    if timeout is None:
+        return None, None
+    return time.time() + timeout, timeout + settings.CACHE_STALE_TTL
+
+
+def set_entry(key, value, timeout, delta=0.0):
+    """Сохраняет значение вместе со сроком свежести и временем расчёта."""
+    expires, physical = _timeouts(timeout)
+    cache.set(key, (value, expires, delta), physical)
+
+
+def _is_fresh(entry):
+    return entry is not None and (entry[1] is None or entry[1] > time.time())
+
+
+def get_entry(key, default=None):
+    """Значение, если его срок не истёк, иначе default."""
+    entry = cache.get(key)
+    return entry[0] if _is_fresh(entry) else default
+
+
+def update(key, change, timeout):
+    """Атомарно меняет свежее значение: change(value) -> новое значение.
+
+    Устаревшее или отсутствующее значение не трогается: его всё равно
+    пересчитают целиком.
+    """
+    with mutex(key):
+        entry = cache.get(key)
+        if _is_fresh(entry):
+            set_entry(key, change(entry[0]), timeout, entry[2])
+
+
+def _generation(key):
+    return cache.get(GENERATION_KEY.format(key), 0)
+
+
+def expire(key):
+    """Помечает значение устаревшим, но оставляет его для выдачи.
+
+    Пока один процесс пересчитывает значение, остальные получают
+    устаревшее, а не ждут и не считают его одновременно. Расчёт,
+    начатый до вызова, своё значение уже не запишет.
+    """
+    with mutex(key):
+        cache.set(GENERATION_KEY.format(key), _generation(key) + 1, None)
+        entry = cache.get(key)
+        if entry is not None:
+            value, _, delta = entry
+            cache.set(key, (value, 0, delta), settings.CACHE_STALE_TTL)
+
+
+def _fresh(entry, beta):
+    _, expires, delta = entry
+    if expires is None:
+        return True
+    # Досрочное обновление (XFetch): чем дольше расчёт и ближе срок,
+    # тем вероятнее, что запрос обновит значение заранее
+    return time.time() - delta * beta * math.log(1 - random.random()) < expires
+
+
+def _wait(key):
+    deadline = time.monotonic() + settings.CACHE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def get_or_set(key, compute, timeout, beta=None):
+    """Значение из кеша; при промахе compute() вызывает один процесс.
+
+    Истёкшее значение пересчитывает тот, кто первым взял блокировку,
+    остальные получают устаревшее. Если значения нет совсем, они ждут
+    до CACHE_LOCK_WAIT секунд, а затем считают сами. Значение, которое
+    устарело через expire() во время расчёта, не сохраняется.
+    """
+    beta = settings.CACHE_EARLY_REFRESH_BETA if beta is None else beta
+    entry = cache.get(key)
+    if entry is not None and _fresh(entry, beta):
+        return entry[0]
+    lock = LOCK_KEY.format(key)
+    locked = add(lock, True, settings.CACHE_LOCK_TIMEOUT)
+    if not locked:
+        if entry is None:
+            entry = _wait(key)
+        if entry is not None:
+            return entry[0]
+    try:
+        generation = _generation(key)
+        started = time.monotonic()
+        value = compute()
+        with mutex(key):
+            if _generation(key) == generation:
+                set_entry(key, value, timeout, time.monotonic() - started)
+        return value
+    finally:
+        if locked:
+            cache.delete(lock)
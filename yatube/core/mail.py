@@ -0,0 +1,151 @@
+import base64
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+
+def dump(message):
+    """EmailMessage -> JSON для хранения в очереди."""
+    attachments = []
+    for filename, content, mimetype in message.attachments:
+        if isinstance(content, str):
+            content = content.encode()
+        attachments.append(
+            [filename, base64.b64encode(content).decode(), mimetype])
+    return json.dumps({
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': message.to,
+        'cc': message.cc,
+        'bcc': message.bcc,
+        'reply_to': message.reply_to,
+        'headers': message.extra_headers,
+        'alternatives': getattr(message, 'alternatives', []),
+        'attachments': attachments,
+    }, ensure_ascii=False)
+
+
+def load(payload, connection=None):
+    data = json.loads(payload)
+    message = EmailMultiAlternatives(
+        subject=data['subject'],
+        body=data['body'],
+        from_email=data['from_email'],
+        to=data['to'],
+        cc=data['cc'],
+        bcc=data['bcc'],
+        reply_to=data['reply_to'],
+        headers=data['headers'],
+        alternatives=[tuple(item) for item in data['alternatives']],
+        connection=connection,
+    )
+    for filename, content, mimetype in data['attachments']:
+        message.attach(filename, base64.b64decode(content), mimetype)
+    return message
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Почтовый backend, который только сохраняет письма в очередь.
+
+    Запрос, отправивший письмо (например, сброс пароля), не ждёт
+    почтовый сервер: отправкой занимается команда send_queued_mail
+    через настоящий backend из EMAIL_OUTBOX_BACKEND.
+    """
+
+    def send_messages(self, email_messages):
+        rows = [
+            OutboxEmail(payload=dump(message))
+            for message in email_messages
+            if message.recipients()
+        ]
+        OutboxEmail.objects.bulk_create(rows)
+        return len(rows)
+
+
+def retry_delay(attempts):
+    """Пауза перед следующей попыткой растёт вдвое с каждой неудачей."""
+    return timedelta(
+        seconds=settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def _failed(row, error, now):
+    row.attempts += 1
+    row.next_attempt = now + retry_delay(row.attempts)
+    row.last_error = repr(error)
+
+
+def _save(row, *fields):
+    OutboxEmail.objects.filter(pk=row.pk).update(
+        **{field: getattr(row, field) for field in fields})
+
+
+def _claim(rows, until):
+    """Забирает письма себе, сдвигая срок попытки на until.
+
+    UPDATE выполняется, только если срок не изменился с момента
+    выборки, поэтому каждое письмо достаётся одному обработчику.
+    Если обработчик упадёт, письма вернутся в очередь в срок until.
+    """
+    claimed = []
+    for row in rows:
+        if OutboxEmail.objects.filter(
+            pk=row.pk, sent__isnull=True, next_attempt=row.next_attempt,
+        ).update(next_attempt=until):
+            row.next_attempt = until
+            claimed.append(row)
+    return claimed
+
+
+def deliver(batch_size=None):
+    """Отправляет пачку писем, которым подошёл срок.
+
+    Все письма пачки уходят через одно соединение с почтовым сервером.
+    Письма сначала забираются (_claim), поэтому send_queued_mail можно
+    запускать в нескольких процессах; каждое письмо отмечается
+    отправленным сразу после отправки. Неудачные попытки
+    откладываются, после EMAIL_OUTBOX_MAX_ATTEMPTS письмо остаётся в
+    таблице с текстом последней ошибки.
+    Возвращает число отправленных писем.
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    now = timezone.now()
+    batch = _claim(OutboxEmail.objects.filter(
+        sent__isnull=True,
+        next_attempt__lte=now,
+        attempts__lt=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+    )[:batch_size], now + timedelta(seconds=settings.EMAIL_OUTBOX_CLAIM))
+    if not batch:
+        return 0
+    sent = 0
+    connection = get_connection(settings.EMAIL_OUTBOX_BACKEND)
+    try:
+        connection.open()
+    except Exception as error:
+        # Сервер недоступен: попытка засчитывается всей пачке
+        for row in batch:
+            _failed(row, error, now)
+        OutboxEmail.objects.bulk_update(
+            batch, ['attempts', 'next_attempt', 'last_error'])
+        return 0
+    try:
+        for row in batch:
+            try:
+                load(row.payload, connection).send()
+            except Exception as error:
+                _failed(row, error, now)
+                _save(row, 'attempts', 'next_attempt', 'last_error')
+            else:
+                row.sent = now
+                row.last_error = ''
+                _save(row, 'sent', 'last_error')
+                sent += 1
+    finally:
+        connection.close()
+    return sent
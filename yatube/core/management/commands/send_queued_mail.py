@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import mail
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди через настоящий почтовый backend'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Сколько писем отправлять через одно соединение',
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, опрашивая очередь',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5.0,
+            help='Пауза между опросами очереди в секундах',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent = mail.deliver(options['batch_size'])
+            if sent:
+                self.stdout.write(f'Отправлено писем: {sent}')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
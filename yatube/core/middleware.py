@@ -0,0 +1,210 @@
+import gzip
+import mimetypes
+import os
+import re
+
+import brotli
+from django.conf import settings
+from django.http import FileResponse, HttpResponseNotAllowed
+from django.utils.cache import patch_vary_headers
+
+
+# Часть имени, которую добавляет ManifestStaticFilesStorage: name.<hash>.ext
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^/.]+$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def accepted_encodings(request):
+    """Кодировки из Accept-Encoding, не запрещённые через q=0."""
+    accepted = set()
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class StaticFilesMiddleware:
+    """Отдаёт собранную статику из STATIC_ROOT в обход view.
+
+    Список файлов и их сжатых копий строится один раз при запуске,
+    а не проверяется на каждый запрос. Файлы с хешем в имени кешируются
+    браузером навсегда, клиенту отдаётся заранее сжатый вариант.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.files = self.scan(settings.STATIC_ROOT)
+
+    def scan(self, root):
+        files = {}
+        if not root or not os.path.isdir(root):
+            return files
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                if filename.endswith(('.gz', '.br')):
+                    continue
+                path = os.path.join(directory, filename)
+                url = os.path.relpath(path, root).replace(os.sep, '/')
+                variants = {
+                    encoding: path + suffix
+                    for encoding, suffix in ENCODINGS
+                    if os.path.exists(path + suffix)
+                }
+                files[url] = (path, variants)
+        return files
+
+    def __call__(self, request):
+        if request.path_info.startswith(self.prefix):
+            entry = self.files.get(request.path_info[len(self.prefix):])
+            if entry is not None:
+                return self.serve(request, *entry)
+        return self.get_response(request)
+
+    def serve(self, request, path, variants):
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(['GET', 'HEAD'])
+        accept = accepted_encodings(request)
+        encoding = None
+        for name, _ in ENCODINGS:
+            if name in variants and name in accept:
+                encoding = name
+                break
+        served = variants[encoding] if encoding else path
+        content_type, _ = mimetypes.guess_type(path)
+        response = FileResponse(
+            open(served, 'rb'),
+            content_type=content_type or 'application/octet-stream',
+        )
+        if encoding:
+            response['Content-Encoding'] = encoding
+        if variants:
+            response['Vary'] = 'Accept-Encoding'
+        if HASHED_NAME.search(path):
+            response['Cache-Control'] = IMMUTABLE
+        else:
+            response['Cache-Control'] = 'public, max-age=60'
+        return response
+
+
+class _Buffer:
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(data)
+
+    def flush(self):
+        pass
+
+    def read(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class _GzipStream:
+    def __init__(self):
+        self.buffer = _Buffer()
+        self.file = gzip.GzipFile(
+            mode='wb', fileobj=self.buffer, mtime=0,
+            compresslevel=settings.COMPRESSION_GZIP_LEVEL)
+
+    @staticmethod
+    def compress(data):
+        return gzip.compress(
+            data, settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+    def process(self, data):
+        self.file.write(data)
+        self.file.flush()
+        return self.buffer.read()
+
+    def finish(self):
+        self.file.close()
+        return self.buffer.read()
+
+
+class _BrotliStream:
+    def __init__(self):
+        self.compressor = brotli.Compressor(
+            quality=settings.COMPRESSION_BROTLI_QUALITY)
+
+    @staticmethod
+    def compress(data):
+        return brotli.compress(
+            data, quality=settings.COMPRESSION_BROTLI_QUALITY)
+
+    def process(self, data):
+        return self.compressor.process(data) + self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+class CompressionMiddleware:
+    """Сжимает ответы gzip или brotli по заголовку Accept-Encoding.
+
+    Маленькие и уже сжатые ответы пропускаются, потоковые ответы
+    сжимаются по частям, не собираясь целиком в памяти. Уровни сжатия
+    задаются настройками COMPRESSION_GZIP_LEVEL и
+    COMPRESSION_BROTLI_QUALITY.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.compress(request, response)
+
+    def choose(self, request):
+        accepted = accepted_encodings(request)
+        if 'br' in accepted:
+            return 'br', _BrotliStream
+        if 'gzip' in accepted:
+            return 'gzip', _GzipStream
+        return None, None
+
+    def compress(self, request, response):
+        if (response.has_header('Content-Encoding')
+                or isinstance(response, FileResponse)):
+            return response
+        if (not response.streaming
+                and len(response.content) < settings.COMPRESSION_MIN_SIZE):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding, stream = self.choose(request)
+        if encoding is None:
+            return response
+        if response.streaming:
+            response.streaming_content = self.stream(
+                stream(), response.streaming_content)
+            del response['Content-Length']
+        else:
+            compressed = stream.compress(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+    def stream(self, stream, chunks):
+        for chunk in chunks:
+            data = stream.process(chunk)
+            if data:
+                yield data
+        yield stream.finish()
@@ -0,0 +1,28 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxEmail(models.Model):
+    """Письмо, ожидающее отправки командой send_queued_mail."""
+
+    payload = models.TextField('Письмо в JSON')
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    next_attempt = models.DateTimeField(
+        'Следующая попытка',
+        default=timezone.now
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    sent = models.DateTimeField('Отправлено', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        ordering = ['next_attempt']
+        verbose_name = 'Письмо в очереди'
+        verbose_name_plural = 'Очередь писем'
+        indexes = [models.Index(
+            fields=['sent', 'next_attempt'],
+            name='outbox_due',
+        )]
+
+    def __str__(self):
+        return f'Письмо #{self.pk}'
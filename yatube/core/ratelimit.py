@@ -0,0 +1,56 @@
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+from . import cache as coalesced_cache
+
+KEY = 'ratelimit:{}:{}'
+
+
+def client_id(request):
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return 'ip:' + request.META.get('REMOTE_ADDR', '')
+
+
+def take(name, ident, now=None):
+    """Забирает токен из корзины; возвращает секунды до следующего токена.
+
+    Ноль означает, что запрос разрешён. Настройки корзины берутся из
+    settings.RATELIMITS: name -> (ёмкость, период пополнения в секундах).
+    Чтение и запись корзины идут под core.cache.mutex, поэтому
+    одновременные запросы из разных процессов не получат лишних токенов.
+    """
+    capacity, period = settings.RATELIMITS[name]
+    now = time.time() if now is None else now
+    key = KEY.format(name, ident)
+    refill = capacity / period
+    with coalesced_cache.mutex(key):
+        tokens, updated = cache.get(key) or (capacity, now)
+        tokens = min(capacity, tokens + (now - updated) * refill)
+        if tokens < 1:
+            return (1 - tokens) / refill
+        cache.set(key, (tokens - 1, now), period)
+    return 0
+
+
+def ratelimit(name, methods=None):
+    """Ограничивает частоту вызовов view для пользователя или IP."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (settings.RATELIMIT_ENABLED
+                    and (methods is None or request.method in methods)):
+                retry_after = take(name, client_id(request))
+                if retry_after:
+                    response = render(
+                        request, 'core/429.html', status=429)
+                    response['Retry-After'] = str(math.ceil(retry_after))
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,49 @@
+import gzip
+import os
+
+import brotli
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.txt', '.html', '.json', '.ico',
+                '.map', '.xml')
+# Сжатая копия сохраняется, только если она заметно меньше оригинала
+MIN_RATIO = 0.95
+
+
+def compressors():
+    yield '.gz', lambda data: gzip.compress(data, 9, mtime=0)
+    yield '.br', lambda data: brotli.compress(data, quality=11)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хешем в имени и заранее сжатыми копиями .gz/.br.
+
+    Сжатие выполняется один раз в collectstatic, чтобы при отдаче файла
+    не тратить на него время процессора.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        names = []
+        for name, hashed_name, processed in super().post_process(
+                paths, dry_run, **options):
+            if not isinstance(processed, Exception):
+                names.extend([name, hashed_name])
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for name in set(names):
+            if name and name.lower().endswith(COMPRESSIBLE):
+                self.compress(name)
+
+    def compress(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as source:
+            data = source.read()
+        for suffix, compress in compressors():
+            compressed = compress(data)
+            if len(compressed) < len(data) * MIN_RATIO:
+                with open(path + suffix, 'wb') as target:
+                    target.write(compressed)
+            elif os.path.exists(path + suffix):
+                os.remove(path + suffix)
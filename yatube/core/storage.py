@@ -0,0 +1,87 @@
+import os
+import threading
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import Storage
+from django.utils.deconstruct import deconstructible
+from django.utils.encoding import filepath_to_uri
+from django.utils.timezone import now
+
+
+@deconstructible
+class InMemoryStorage(Storage):
+    """Хранилище файлов в памяти процесса для тестов.
+
+    Загруженные картинки и миниатюры sorl-thumbnail не пишутся на диск,
+    поэтому тестам не нужен временный MEDIA_ROOT. Содержимое общее для
+    всех экземпляров хранилища в процессе: файл, сохранённый через поле
+    модели, виден и генератору миниатюр.
+    """
+
+    _files = {}
+    _lock = threading.Lock()
+
+    def __init__(self, base_url=None):
+        self.base_url = base_url
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._files.clear()
+
+    def _open(self, name, mode='rb'):
+        try:
+            content, _ = self._files[name]
+        except KeyError:
+            raise FileNotFoundError(name)
+        return ContentFile(content, name=name)
+
+    def _save(self, name, content):
+        content.seek(0)
+        data = content.read()
+        if isinstance(data, str):
+            data = data.encode()
+        with self._lock:
+            self._files[name] = (data, now())
+        return name
+
+    def exists(self, name):
+        return name in self._files
+
+    def delete(self, name):
+        with self._lock:
+            self._files.pop(name, None)
+
+    def size(self, name):
+        return len(self._files[name][0])
+
+    def listdir(self, path):
+        prefix = path.rstrip('/') + '/' if path else ''
+        directories, files = set(), []
+        for name in list(self._files):
+            if not name.startswith(prefix):
+                continue
+            rest = name[len(prefix):]
+            if '/' in rest:
+                directories.add(rest.split('/', 1)[0])
+            else:
+                files.append(rest)
+        return sorted(directories), sorted(files)
+
+    def url(self, name):
+        base_url = self.base_url or settings.MEDIA_URL
+        return base_url + filepath_to_uri(name).lstrip('/')
+
+    def get_created_time(self, name):
+        return self._files[name][1]
+
+    get_modified_time = get_accessed_time = get_created_time
+
+    def get_available_name(self, name, max_length=None):
+        return super().get_available_name(
+            os.path.normpath(name).replace(os.sep, '/'), max_length)
+
+    def read(self, name):
+        """Содержимое файла целиком; удобно для проверок в тестах."""
+        return self._files[name][0]
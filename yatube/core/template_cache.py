@@ -0,0 +1,45 @@
+import os
+
+from django.conf import settings
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.template.loaders.cached import Loader as CachedLoader
+from django.template.utils import get_app_template_dirs
+
+
+def _project_dirs(engine):
+    dirs = list(engine.dirs)
+    # Шаблоны админки и сторонних приложений прогреваются по требованию
+    dirs += [
+        directory for directory in get_app_template_dirs('templates')
+        if str(directory).startswith(settings.BASE_DIR)
+    ]
+    return dirs
+
+
+def _names(directory):
+    for root, _, files in os.walk(directory):
+        for filename in files:
+            if filename.endswith('.html'):
+                path = os.path.join(root, filename)
+                yield os.path.relpath(path, directory).replace(os.sep, '/')
+
+
+def precompile_templates():
+    """Заранее разбирает шаблоны проекта в cached.Loader.
+
+    Возвращает число скомпилированных шаблонов.
+    """
+    compiled = 0
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        engine = backend.engine
+        if not any(isinstance(loader, CachedLoader)
+                   for loader in engine.template_loaders):
+            continue
+        for directory in _project_dirs(engine):
+            for name in _names(directory):
+                engine.get_template(name)
+                compiled += 1
+    return compiled
@@ -0,0 +1,46 @@
+from django import template
+from django.core.cache.utils import make_template_fragment_key
+from django.templatetags.cache import CacheNode, do_cache
+
+from core import cache
+
+
+register = template.Library()
+
+
+class CoalescedCacheNode(CacheNode):
+    """Фрагмент, который после истечения срока пересчитывает один запрос."""
+
+    def render(self, context):
+        if self.cache_name:
+            raise template.TemplateSyntaxError(
+                'Тег cache из core_cache работает только с кешем default')
+        try:
+            expire_time = self.expire_time_var.resolve(context)
+        except template.VariableDoesNotExist:
+            raise template.TemplateSyntaxError(
+                f'"cache" tag got an unknown variable: '
+                f'{self.expire_time_var.var!r}')
+        if expire_time is not None:
+            try:
+                expire_time = int(expire_time)
+            except (ValueError, TypeError):
+                raise template.TemplateSyntaxError(
+                    f'"cache" tag got a non-integer timeout value: '
+                    f'{expire_time!r}')
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        key = make_template_fragment_key(self.fragment_name, vary_on)
+        return cache.get_or_set(
+            key, lambda: self.nodelist.render(context), expire_time)
+
+
+@register.tag('cache')
+def do_coalesced_cache(parser, token):
+    """{% cache %} с защитой от одновременного пересчёта.
+
+    Синтаксис тот же, что у встроенного тега.
+    """
+    node = do_cache(parser, token)
+    return CoalescedCacheNode(
+        node.nodelist, node.expire_time_var, node.fragment_name,
+        node.vary_on, node.cache_name)
@@ -0,0 +1,20 @@
+from django.test.runner import DiscoverRunner, default_test_processes
+
+
+class ParallelDiscoverRunner(DiscoverRunner):
+    """DiscoverRunner, который по умолчанию запускает тесты параллельно.
+
+    Число процессов берётся из --parallel, переменной окружения
+    DJANGO_TEST_PROCESSES или по числу ядер. Для SQLite каждый процесс
+    работает со своей копией тестовой базы, поэтому тесты не мешают
+    друг другу. --parallel 1 возвращает последовательный запуск.
+    """
+
+    @classmethod
+    def add_arguments(cls, parser):
+        super().add_arguments(parser)
+        parser.set_defaults(parallel=0)
+
+    def __init__(self, parallel=0, **kwargs):
+        super().__init__(
+            parallel=parallel or default_test_processes(), **kwargs)
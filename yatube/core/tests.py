@@ -0,0 +1,524 @@
+import asyncio
+import gzip
+import importlib
+import os
+import shutil
+import socketserver
+import tempfile
+import threading
+import time
+from unittest import mock
+
+import brotli
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache as django_cache
+from django.core.management import call_command
+from django.http import HttpResponse, StreamingHttpResponse
+from django.template import engines
+from django.test import (RequestFactory, SimpleTestCase, TestCase,
+                         override_settings)
+from django.urls import clear_url_caches, reverse
+from django.utils import timezone
+
+from . import cache
+from .asgi import WsgiToAsgi, get_asgi_application
+from .mail import deliver, load
+from .middleware import CompressionMiddleware, StaticFilesMiddleware
+from .models import OutboxEmail
+from .template_cache import precompile_templates
+
+
+def templates_with(loaders):
+    return [dict(
+        settings.TEMPLATES[0],
+        OPTIONS=dict(settings.TEMPLATES[0]['OPTIONS'], loaders=loaders),
+    )]
+
+
+CACHED_TEMPLATES = templates_with([(
+    'django.template.loaders.cached.Loader',
+    settings.TEMPLATE_LOADERS,
+)])
+PLAIN_TEMPLATES = templates_with(settings.TEMPLATE_LOADERS)
+
+
+class PrecompileTemplatesTest(SimpleTestCase):
+    @override_settings(TEMPLATES=CACHED_TEMPLATES)
+    def test_templates_are_compiled_once(self):
+        """Шаблоны проекта попадают в кеш загрузчика при старте."""
+        self.assertGreater(precompile_templates(), 0)
+        loader = engines['django'].engine.template_loaders[0]
+        self.assertIn('posts/index.html', loader.get_template_cache)
+
+    @override_settings(TEMPLATES=PLAIN_TEMPLATES)
+    def test_nothing_to_compile_without_cached_loader(self):
+        """Без cached.Loader прекомпиляция ничего не делает."""
+        self.assertEqual(precompile_templates(), 0)
+
+
+class CompressedStaticFilesTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.source = tempfile.mkdtemp()
+        cls.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(cls.source, 'css'))
+        with open(os.path.join(cls.source, 'css', 'site.css'), 'w') as css:
+            css.write('body { color: red; }\n' * 100)
+        cls.settings = override_settings(
+            STATICFILES_DIRS=[cls.source],
+            # Статика админки здесь не нужна и только замедляет сборку
+            STATICFILES_FINDERS=[
+                'django.contrib.staticfiles.finders.FileSystemFinder'],
+            STATIC_ROOT=cls.root,
+            STATICFILES_STORAGE=(
+                'core.staticfiles.CompressedManifestStaticFilesStorage'),
+        )
+        cls.settings.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        shutil.rmtree(cls.source, ignore_errors=True)
+        shutil.rmtree(cls.root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.middleware = StaticFilesMiddleware(lambda request: HttpResponse())
+        self.hashed = next(
+            name for name in self.middleware.files
+            if name.startswith('css/site.') and name != 'css/site.css'
+        )
+
+    def test_collectstatic_writes_compressed_copies(self):
+        """collectstatic создаёт сжатую копию файла с хешем в имени."""
+        self.assertTrue(
+            os.path.exists(os.path.join(self.root, self.hashed + '.gz')))
+
+    def test_hashed_file_served_compressed_and_immutable(self):
+        """Файл с хешем отдаётся сжатым и с долгим кешированием."""
+        request = RequestFactory().get(
+            '/static/' + self.hashed, HTTP_ACCEPT_ENCODING='gzip')
+        response = self.middleware(request)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        response.close()
+
+    def test_brotli_copy_preferred(self):
+        """Копия .br отдаётся клиентам, которые принимают brotli."""
+        request = RequestFactory().get(
+            '/static/' + self.hashed, HTTP_ACCEPT_ENCODING='gzip, br')
+        response = self.middleware(request)
+        self.assertEqual(response['Content-Encoding'], 'br')
+        content = b''.join(response.streaming_content)
+        response.close()
+        with open(os.path.join(self.root, self.hashed), 'rb') as source:
+            self.assertEqual(brotli.decompress(content), source.read())
+
+    def test_plain_file_without_accept_encoding(self):
+        """Без Accept-Encoding отдаётся несжатый файл."""
+        request = RequestFactory().get('/static/css/site.css')
+        response = self.middleware(request)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertNotIn('immutable', response['Cache-Control'])
+        response.close()
+
+    def test_other_paths_pass_through(self):
+        """Остальные запросы передаются дальше."""
+        response = self.middleware(RequestFactory().get('/static/none.css'))
+        self.assertEqual(response.content, b'')
+
+
+class CompressionMiddlewareTest(SimpleTestCase):
+    html = '<p>Текст поста</p>' * 100
+
+    def get(self, response, **headers):
+        middleware = CompressionMiddleware(lambda request: response)
+        return middleware(RequestFactory().get('/', **headers))
+
+    def test_gzip_when_accepted(self):
+        """HTML сжимается gzip, если клиент его принимает."""
+        response = self.get(
+            HttpResponse(self.html), HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(
+            gzip.decompress(response.content).decode(), self.html)
+
+    def test_brotli_preferred_when_accepted(self):
+        """При поддержке обоих сжатий выбирается brotli."""
+        response = self.get(
+            HttpResponse(self.html), HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(
+            brotli.decompress(response.content).decode(), self.html)
+
+    def test_brotli_streaming_response(self):
+        response = self.get(
+            StreamingHttpResponse([self.html] * 3), HTTP_ACCEPT_ENCODING='br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        content = b''.join(response.streaming_content)
+        self.assertEqual(brotli.decompress(content).decode(), self.html * 3)
+
+    def test_refused_encoding_is_not_used(self):
+        """Кодировка с q=0 не используется."""
+        response = self.get(
+            HttpResponse(self.html), HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_small_and_encoded_responses_skipped(self):
+        """Маленькие и уже сжатые ответы не трогаются."""
+        response = self.get(
+            HttpResponse('<p>мало</p>'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        encoded = HttpResponse(self.html)
+        encoded['Content-Encoding'] = 'identity'
+        response = self.get(encoded, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'identity')
+
+    @override_settings(COMPRESSION_GZIP_LEVEL=1)
+    def test_streaming_response(self):
+        """Потоковый ответ сжимается по частям."""
+        response = self.get(
+            StreamingHttpResponse([self.html] * 3),
+            HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        content = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(content).decode(), self.html * 3)
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Минимальный SMTP-сервер: принимает письма и запоминает их."""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply('220 localhost')
+        while True:
+            line = self.rfile.readline().decode().strip()
+            command = line[:4].upper()
+            if not line or command == 'QUIT':
+                self.reply('221 bye')
+                return
+            if command == 'DATA':
+                self.reply('354 end with .')
+                lines = []
+                for data in iter(self.rfile.readline, b'.\r\n'):
+                    lines.append(data.decode())
+                self.server.messages.append(''.join(lines))
+            self.reply('250 OK')
+
+
+class SMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.connections = 0
+        self.messages = []
+
+
+@override_settings(
+    EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+    EMAIL_OUTBOX_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+    EMAIL_HOST='127.0.0.1',
+    EMAIL_OUTBOX_RETRY_DELAY=60,
+)
+class QueuedEmailTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create_user(
+            username='test_user', email='user@example.com',
+            password='password')
+        cls.server = SMTPServer()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.connections = 0
+        self.server.messages = []
+        self.settings = override_settings(
+            EMAIL_PORT=self.server.server_address[1])
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+
+    def test_password_reset_is_queued(self):
+        """Сброс пароля только ставит письмо в очередь."""
+        response = self.client.post(
+            reverse('users:password_reset_form'),
+            {'email': 'user@example.com'})
+        self.assertRedirects(response, reverse('users:password_reset_done'))
+        self.assertEqual(self.server.messages, [])
+        self.assertEqual(OutboxEmail.objects.count(), 1)
+        self.assertEqual(deliver(), 1)
+        self.assertIn('To: user@example.com', self.server.messages[0])
+        self.assertTrue(OutboxEmail.objects.get().sent)
+        self.assertEqual(deliver(), 0)
+
+    def test_batch_uses_one_connection(self):
+        """Пачка писем уходит через одно SMTP-соединение."""
+        for number in range(3):
+            mail.send_mail(
+                f'Тема {number}', 'Текст', None, ['user@example.com'])
+        self.assertEqual(deliver(), 3)
+        self.assertEqual(len(self.server.messages), 3)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_failed_delivery_is_retried_later(self):
+        """Недоступный сервер откладывает письмо до следующей попытки."""
+        mail.send_mail('Тема', 'Текст', None, ['user@example.com'])
+        with override_settings(EMAIL_PORT=1):
+            self.assertEqual(deliver(), 0)
+        message = OutboxEmail.objects.get()
+        self.assertEqual(message.attempts, 1)
+        self.assertTrue(message.last_error)
+        self.assertGreater(message.next_attempt, message.created)
+        self.assertEqual(deliver(), 0)
+        OutboxEmail.objects.update(next_attempt=message.created)
+        self.assertEqual(deliver(), 1)
+        self.assertEqual(len(self.server.messages), 1)
+
+    def test_workers_do_not_send_twice(self):
+        """Второй обработчик не берёт письма, забранные первым."""
+        for number in range(2):
+            mail.send_mail(
+                f'Тема {number}', 'Текст', None, ['user@example.com'])
+        sent_before = []
+        other_worker = []
+
+        def load_and_check(*args):
+            sent_before.append(
+                OutboxEmail.objects.filter(sent__isnull=False).count())
+            if not other_worker:
+                other_worker.append(deliver())
+            return load(*args)
+
+        with mock.patch('core.mail.load', load_and_check):
+            self.assertEqual(deliver(), 2)
+        self.assertEqual(other_worker, [0])
+        self.assertEqual(sent_before, [0, 1])
+        self.assertEqual(len(self.server.messages), 2)
+
+    def test_claim_expires(self):
+        """Письма упавшего обработчика возвращаются в очередь."""
+        mail.send_mail('Тема', 'Текст', None, ['user@example.com'])
+        with mock.patch('core.mail.load', side_effect=SystemExit):
+            with self.assertRaises(SystemExit):
+                deliver()
+        self.assertEqual(deliver(), 0)
+        OutboxEmail.objects.update(next_attempt=timezone.now())
+        self.assertEqual(deliver(), 1)
+
+
+class MediaUrlsTest(SimpleTestCase):
+    def reload_urls(self):
+        from yatube import urls
+        importlib.reload(urls)
+        clear_url_caches()
+
+    def test_media_served_only_when_enabled(self):
+        """Без DEBUG картинки отдаются, только если включён SERVE_MEDIA."""
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        with open(os.path.join(media_root, 'image.txt'), 'w') as image:
+            image.write('картинка')
+        self.addCleanup(self.reload_urls)
+        for serve_media, status in ((False, 404), (True, 200)):
+            with self.subTest(serve_media=serve_media), override_settings(
+                    DEBUG=False, SERVE_MEDIA=serve_media,
+                    MEDIA_ROOT=media_root):
+                self.reload_urls()
+                response = self.client.get('/media/image.txt')
+                self.assertEqual(response.status_code, status)
+
+
+class AsgiApplicationTest(SimpleTestCase):
+    def call(self, scope, messages):
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(get_asgi_application()(scope, receive, send))
+        return sent
+
+    def test_request_is_served_through_thread_pool(self):
+        """ASGI-точка входа отдаёт тот же ответ, что и WSGI."""
+        sent = self.call({
+            'type': 'http',
+            'method': 'GET',
+            'path': reverse('about:author'),
+            'query_string': b'',
+            'headers': [(b'host', b'testserver')],
+        }, [{'type': 'http.request', 'body': b''}])
+        self.assertEqual(sent[0]['type'], 'http.response.start')
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertIn(
+            (b'content-type', b'text/html; charset=utf-8'), sent[0]['headers'])
+        body = b''.join(message.get('body', b'') for message in sent[1:])
+        self.assertEqual(
+            body, self.client.get(reverse('about:author')).content)
+
+    def test_stream_stops_on_disconnect(self):
+        """После отключения клиента поток больше не читается."""
+        pulled = []
+
+        def chunks():
+            while True:
+                pulled.append(len(pulled))
+                time.sleep(0.01)
+                yield b'chunk'
+
+        def application(environ, start_response):
+            start_response('200 OK', [])
+            return StreamingHttpResponse(chunks())
+
+        messages = [{'type': 'http.request', 'body': b''}]
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await asyncio.sleep(0.1)
+            return {'type': 'http.disconnect'}
+
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        app = WsgiToAsgi(application, threads=1, stream_threads=1)
+        asyncio.run(asyncio.wait_for(app({
+            'type': 'http',
+            'method': 'GET',
+            'path': '/',
+            'query_string': b'',
+            'headers': [],
+        }, receive, send), 5))
+        self.assertTrue(pulled)
+        self.assertLess(len(pulled), 50)
+        self.assertFalse(any(
+            message['type'] == 'http.response.body'
+            and not message.get('more_body') for message in sent))
+
+    def test_lifespan(self):
+        sent = self.call({'type': 'lifespan'}, [
+            {'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}])
+        self.assertEqual(
+            [message['type'] for message in sent],
+            ['lifespan.startup.complete', 'lifespan.shutdown.complete']
+        )
+
+
+class CoalescedCacheTest(SimpleTestCase):
+    def setUp(self):
+        django_cache.clear()
+        self.calls = 0
+
+    def compute(self, delay=0):
+        def compute():
+            self.calls += 1
+            time.sleep(delay)
+            return self.calls
+        return compute
+
+    def test_concurrent_misses_compute_once(self):
+        """Одновременные промахи вызывают расчёт один раз."""
+        results = []
+
+        def worker():
+            results.append(cache.get_or_set('key', self.compute(0.2), 60))
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, [1] * 5)
+
+    def test_stale_value_served_during_refresh(self):
+        """Пока значение пересчитывается, остальные получают старое."""
+        cache.get_or_set('key', self.compute(), 60)
+        cache.expire('key')
+        django_cache.add(cache.LOCK_KEY.format('key'), True)
+        self.assertEqual(cache.get_or_set('key', self.compute(), 60), 1)
+        self.assertIsNone(cache.get_entry('key'))
+        django_cache.delete(cache.LOCK_KEY.format('key'))
+        self.assertEqual(cache.get_or_set('key', self.compute(), 60), 2)
+        self.assertEqual(cache.get_entry('key'), 2)
+
+    def test_early_refresh_before_expiry(self):
+        """Долгий расчёт обновляется заранее, до истечения срока."""
+        with mock.patch('core.cache.random.random', return_value=0.5):
+            # -1000 * ln(0.5) ≈ 693 секунды: больше оставшихся 60
+            cache.set_entry('key', 'old', 60, delta=1000)
+            self.assertEqual(cache.get_or_set('key', self.compute(), 60), 1)
+            cache.set_entry('key', 'old', 60, delta=0)
+            self.assertEqual(
+                cache.get_or_set('key', self.compute(), 60), 'old')
+
+    def test_expire_during_compute_discards_result(self):
+        """Расчёт, начатый до сброса, не перезаписывает сброс."""
+        cache.set_entry('key', 'old', None)
+        cache.expire('key')
+
+        def compute():
+            cache.expire('key')
+            return 'computed from old data'
+
+        self.assertEqual(
+            cache.get_or_set('key', compute, None), 'computed from old data')
+        self.assertIsNone(cache.get_entry('key'))
+        self.assertEqual(cache.get_or_set('key', self.compute(), None), 1)
+
+    def test_update_changes_only_fresh_value(self):
+        cache.update('key', lambda value: value + 1, None)
+        self.assertIsNone(cache.get_entry('key'))
+        cache.set_entry('key', 1, None)
+        cache.update('key', lambda value: value + 1, None)
+        self.assertEqual(cache.get_entry('key'), 2)
+        cache.expire('key')
+        cache.update('key', lambda value: value + 1, None)
+        self.assertIsNone(cache.get_entry('key'))
+
+    def test_add_is_atomic_across_threads(self):
+        results = []
+        barrier = threading.Barrier(8)
+
+        def worker():
+            barrier.wait()
+            results.append(cache.add('lock', True, 60))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results.count(True), 1)
+
+    @override_settings(TEMPLATES=PLAIN_TEMPLATES)
+    def test_template_tag(self):
+        template = engines['django'].from_string(
+            '{% load core_cache %}{% cache 60 fragment name %}'
+            '{{ value }}{% endcache %}')
+        self.assertEqual(
+            template.render({'name': 'a', 'value': 'первый'}), 'первый')
+        self.assertEqual(
+            template.render({'name': 'a', 'value': 'второй'}), 'первый')
+        self.assertEqual(
+            template.render({'name': 'b', 'value': 'второй'}), 'второй')
@@ -1,9 +1,56 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
 
+from . import deletion, search
 from .models import Post, Group, Comment, Follow
 
 
-class PostAdmin(admin.ModelAdmin):
+class CappedCountPaginator(Paginator):
+    """Пагинатор, который не считает строки дальше COUNT_LIMIT.
+
+    На больших таблицах COUNT(*) по всему списку занимает секунды,
+    поэтому число записей оценивается сверху: дальние страницы доступны
+    через фильтры, поиск и иерархию дат.
+    """
+
+    COUNT_LIMIT = 10000
+
+    @cached_property
+    def count(self):
+        return self.object_list[:self.COUNT_LIMIT].count()
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    """Общие настройки списков для больших таблиц."""
+
+    paginator = CappedCountPaginator
+    # Без второго COUNT(*) по всей таблице рядом с результатом фильтра
+    show_full_result_count = False
+
+
+class SoftDeleteAdmin(ScalableAdmin):
+    """Удаление из админки только ставит пометку deleted_at.
+
+    Страница подтверждения не собирает каскад зависимых строк: их
+    удалит команда purge_deleted.
+    """
+
+    soft_delete = None
+
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        model_count = {self.model._meta.verbose_name_plural: len(objs)}
+        return [str(obj) for obj in objs], model_count, set(), []
+
+    def delete_model(self, request, obj):
+        self.soft_delete([obj.pk])
+
+    def delete_queryset(self, request, queryset):
+        self.soft_delete(list(queryset.values_list('pk', flat=True)))
+
+
+class PostAdmin(SoftDeleteAdmin):
     # Перечисляем поля, которые должны отображаться в админке
     list_display = (
         'pk',
@@ -12,9 +59,26 @@ class PostAdmin(admin.ModelAdmin):
         'author',
         'group',)
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    raw_id_fields = ('author',)
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
     empty_value_display = '-пусто-'
+    soft_delete = staticmethod(deletion.delete_posts)
+
+    def get_changelist_formset(self, request, **kwargs):
+        formset = super().get_changelist_formset(request, **kwargs)
+        # Список групп для редактируемых строк выбирается один раз
+        field = formset.form.base_fields['group']
+        field.choices = list(field.choices)
+        return formset
+
+    def get_search_results(self, request, queryset, search_term):
+        # Запрос из одних пробелов дал бы пустой MATCH и ошибку SQLite
+        if search_term.split() and search.is_installed():
+            return search.filter_posts(queryset, search_term), False
+        return super().get_search_results(request, queryset, search_term)
 
 
 class GroupAdmin(admin.ModelAdmin):
@@ -29,7 +93,7 @@ class GroupAdmin(admin.ModelAdmin):
     list_display_links = ('title',)
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(SoftDeleteAdmin):
     list_display = (
         'pk',
         'author',
@@ -37,17 +101,23 @@ class CommentAdmin(admin.ModelAdmin):
         'created',
     )
     list_editable = ('text',)
-    list_filter = ('author',)
+    list_select_related = ('author',)
+    raw_id_fields = ('author', 'post')
+    # Фильтр по автору — точное совпадение имени по индексу
+    search_fields = ('=author__username',)
+    date_hierarchy = 'created'
+    soft_delete = staticmethod(deletion.delete_comments)
 
 
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(ScalableAdmin):
     list_display = (
         'pk',
         'user',
         'author',
     )
-    list_filter = ('user', 'author')
-    search_fields = ('user',)
+    list_select_related = ('user', 'author')
+    raw_id_fields = ('user', 'author')
+    search_fields = ('=user__username', '=author__username')
     list_display_links = ('user',)
 
 
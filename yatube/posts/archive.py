@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import feed_cache
+from .models import ArchivedComment, ArchivedPost, Comment, Post
+
+
+POST_FIELDS = (
+    'id', 'text', 'text_html', 'render_version', 'pub_date', 'author_id',
+    'group_id', 'image', 'views', 'excerpt', 'has_more',
+)
+COMMENT_FIELDS = (
+    'id', 'text', 'text_html', 'render_version', 'created', 'author_id',
+    'post_id',
+)
+
+
+def _copy(model, source, fields):
+    return model(**{field: getattr(source, field) for field in fields})
+
+
+def _archive_batch(post_ids):
+    with transaction.atomic():
+        posts = Post.objects.filter(id__in=post_ids).only(*POST_FIELDS)
+        ArchivedPost.objects.bulk_create(
+            [_copy(ArchivedPost, post, POST_FIELDS) for post in posts],
+            ignore_conflicts=True,
+        )
+        comments = Comment.objects.filter(
+            post_id__in=post_ids).only(*COMMENT_FIELDS)
+        ArchivedComment.objects.bulk_create(
+            [_copy(ArchivedComment, comment, COMMENT_FIELDS)
+             for comment in comments],
+            ignore_conflicts=True,
+        )
+        # Помеченные удалёнными комментарии в архив не попадают
+        Comment.all_objects.filter(post_id__in=post_ids).delete()
+        Post.objects.filter(id__in=post_ids).delete()
+    feed_cache.posts_changed()
+
+
+def archive(days=None, batch_size=None):
+    """Переносит посты старше days дней вместе с комментариями в архив.
+
+    Каждая пачка копируется и удаляется из рабочих таблиц в одной
+    транзакции, поэтому прерванный перенос продолжается повторным
+    запуском с того же места. Возвращает число перенесённых постов.
+    """
+    days = settings.ARCHIVE_AFTER_DAYS if days is None else days
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    cutoff = timezone.now() - timedelta(days=days)
+    archived = 0
+    while True:
+        post_ids = list(Post.objects.filter(
+            pub_date__lt=cutoff
+        ).order_by('pub_date', 'id').values_list('id', flat=True)[
+            :batch_size])
+        if not post_ids:
+            return archived
+        _archive_batch(post_ids)
+        archived += len(post_ids)
+
+
+def get_archived_post(post_id):
+    """Архивный пост для post_detail, если в рабочей таблице его нет."""
+    return ArchivedPost.objects.select_related(
+        'author', 'group').filter(pk=post_id).first()
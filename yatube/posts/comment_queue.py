@@ -0,0 +1,207 @@
+import fcntl
+import glob
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+
+from . import trending
+from .models import Comment, Post, User
+
+
+QUEUE_FILE = 'comments.jsonl'
+LOCK_FILE = 'comments.lock'
+PROCESSING_SUFFIX = '.processing'
+SESSION_KEY = 'pending_comments'
+# Сколько секунд показывать автору ещё не записанный комментарий
+PENDING_TTL = 600
+
+
+def _path(name):
+    return os.path.join(settings.COMMENT_QUEUE_DIR, name)
+
+
+@contextmanager
+def _locked():
+    os.makedirs(settings.COMMENT_QUEUE_DIR, exist_ok=True)
+    with open(_path(LOCK_FILE), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def enqueue(post_id, author_id, text):
+    """Дописывает проверенный комментарий в очередь на диске."""
+    entry = {
+        'id': uuid.uuid4().hex,
+        'post_id': post_id,
+        'author_id': author_id,
+        'text': text,
+        'ts': time.time(),
+    }
+    line = (json.dumps(entry, ensure_ascii=False) + '\n').encode()
+    with _locked():
+        fd = os.open(
+            _path(QUEUE_FILE), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644
+        )
+        try:
+            os.write(fd, line)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    return entry
+
+
+def _claimed_path(stamp):
+    """Имя файла очереди, принадлежащего этому процессу."""
+    return f'{_path(QUEUE_FILE)}.{stamp}.{os.getpid()}{PROCESSING_SUFFIX}'
+
+
+def _stamp(path):
+    """Метка времени из имени файла: по ней сохраняется порядок очереди."""
+    return os.path.basename(path)[len(QUEUE_FILE) + 1:].split('.')[0]
+
+
+@contextmanager
+def _claim():
+    """Забирает файлы очереди этому процессу и держит их под flock.
+
+    Текущая очередь переименовывается в файл с pid процесса. Файлы
+    других процессов забираются, только если их flock свободен, то есть
+    начавший обработку процесс аварийно завершился; если он ещё
+    работает, файл пропускается.
+    """
+    claimed = []
+    try:
+        with _locked():
+            source = _path(QUEUE_FILE)
+            if os.path.exists(source):
+                os.rename(source, _claimed_path(time.time_ns()))
+            for path in sorted(glob.glob(source + '.*' + PROCESSING_SUFFIX)):
+                queue = open(path, 'rb')
+                try:
+                    fcntl.flock(queue, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    queue.close()
+                    continue
+                target = _claimed_path(_stamp(path))
+                os.rename(path, target)
+                claimed.append((target, queue))
+        yield [path for path, _ in claimed]
+    finally:
+        for _, queue in claimed:
+            queue.close()
+
+
+def _read(path):
+    entries = []
+    with open(path, encoding='utf-8') as queue:
+        for line in queue:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                # Недописанная строка после сбоя — пропускаем
+                continue
+    return entries
+
+
+def _save(entries, batch_size):
+    # Пачка могла быть записана до сбоя, но файл остался: такие записи
+    # узнаём по номеру и пропускаем
+    saved = {
+        queue_id.hex for queue_id in Comment.all_objects.filter(
+            queue_id__in=[entry['id'] for entry in entries if 'id' in entry]
+        ).values_list('queue_id', flat=True)
+    }
+    entries = [entry for entry in entries if entry.get('id') not in saved]
+    post_ids = set(
+        Post.objects.filter(
+            id__in={entry['post_id'] for entry in entries}
+        ).values_list('id', flat=True)
+    )
+    author_ids = set(
+        User.objects.filter(
+            id__in={entry['author_id'] for entry in entries}
+        ).values_list('id', flat=True)
+    )
+    comments = [
+        Comment(
+            post_id=entry['post_id'],
+            author_id=entry['author_id'],
+            text=entry['text'],
+            queue_id=entry.get('id'),
+        )
+        for entry in entries
+        if entry['post_id'] in post_ids and entry['author_id'] in author_ids
+    ]
+    # bulk_create не вызывает save(), поэтому HTML отрисовываем здесь
+    for comment in comments:
+        comment.render_text()
+    with transaction.atomic():
+        Comment.objects.bulk_create(comments, batch_size=batch_size)
+    # bulk_create не отправляет post_save, поэтому учитываем вручную
+    for comment in comments:
+        trending.comment_added(comment.post_id)
+    return len(comments)
+
+
+def drain(batch_size=None):
+    """Переносит накопленные комментарии в базу пачками.
+
+    Возвращает число созданных комментариев.
+    """
+    batch_size = batch_size or settings.COMMENT_QUEUE_BATCH_SIZE
+    created = 0
+    with _claim() as paths:
+        for path in paths:
+            entries = _read(path)
+            for start in range(0, len(entries), batch_size):
+                created += _save(
+                    entries[start:start + batch_size], batch_size)
+            os.remove(path)
+    return created
+
+
+def remember_pending(session, entry):
+    pending = session.get(SESSION_KEY, [])
+    pending.append(entry)
+    session[SESSION_KEY] = pending
+
+
+def pending_for_post(session, post_id, comments, author):
+    """Комментарии автора, которые ещё не попали в базу.
+
+    Возвращает несохранённые Comment с отрисованным текстом, чтобы
+    шаблон показывал их так же, как сохранённые. Уже записанные в базу
+    и устаревшие записи удаляются из сессии.
+    """
+    pending = session.get(SESSION_KEY)
+    if not pending:
+        return []
+    saved = {
+        comment.queue_id.hex for comment in comments if comment.queue_id
+    }
+    deadline = time.time() - PENDING_TTL
+    keep = [
+        entry for entry in pending
+        if entry['ts'] > deadline and entry.get('id') not in saved
+    ]
+    if len(keep) != len(pending):
+        session[SESSION_KEY] = keep
+    comments = []
+    for entry in keep:
+        if entry['post_id'] == post_id:
+            comment = Comment(post_id=post_id, author=author,
+                              text=entry['text'])
+            comment.render_text()
+            comments.append(comment)
+    return comments
@@ -0,0 +1,17 @@
+from functools import partial
+
+from . import notifications
+
+
+def unread_notifications(request):
+    """Число непрочитанных уведомлений для шапки сайта.
+
+    Передаётся функцией, поэтому счётчик запрашивается, только если
+    шаблон его выводит.
+    """
+    if not request.user.is_authenticated:
+        return {}
+    return {
+        'unread_notifications': partial(
+            notifications.unread_count, request.user),
+    }
@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.utils import timezone
+
+from . import feed_cache, group_stats, notifications, trending
+from .models import Comment, Notification, Post
+
+
+def delete_posts(post_ids):
+    """Помечает посты удалёнными и убирает их из кешей.
+
+    Одно UPDATE вместо каскадного удаления комментариев: пост сразу
+    пропадает из лент, а строки убирает purge(). Кеш фрагмента главной
+    живёт 20 секунд и не сбрасывается.
+    """
+    post_ids = list(post_ids)
+    Post.objects.filter(id__in=post_ids).update(deleted_at=timezone.now())
+    notifications.forget_unread(Notification.objects.filter(
+        post_id__in=post_ids, is_read=False
+    ).values_list('user_id', flat=True).distinct())
+    group_stats.invalidate_stats()
+    trending.forget(post_ids)
+    feed_cache.posts_changed()
+
+
+def delete_comments(comment_ids):
+    Comment.objects.filter(id__in=comment_ids).update(
+        deleted_at=timezone.now())
+
+
+def delete_in_batches(queryset, batch_size, on_batch=None):
+    """Удаляет строки queryset пачками; возвращает их число."""
+    removed = 0
+    while True:
+        ids = list(queryset.order_by('id').values_list('id', flat=True)[
+            :batch_size])
+        if not ids:
+            return removed
+        batch = queryset.model._base_manager.filter(id__in=ids)
+        if on_batch is not None:
+            on_batch(batch)
+        batch.delete()
+        removed += len(ids)
+
+
+def _forget_unread(notification_batch):
+    notifications.forget_unread(
+        notification_batch.values_list('user_id', flat=True).distinct())
+
+
+def purge(batch_size=None):
+    """Окончательно удаляет помеченные посты и комментарии.
+
+    Зависимые строки удаляются пачками по batch_size, каждая пачка в
+    своей транзакции, поэтому запись в базу не блокируется надолго.
+    Прерванный запуск продолжается следующим.
+    Возвращает число удалённых строк.
+    """
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    removed = delete_in_batches(
+        Comment.all_objects.filter(deleted_at__isnull=False), batch_size)
+    post_ids = list(Post.all_objects.filter(
+        deleted_at__isnull=False).order_by('id').values_list('id', flat=True))
+    for post_id in post_ids:
+        removed += purge_post(post_id, batch_size)
+    return removed
+
+
+def purge_post(post_id, batch_size):
+    """Удаляет пост после его комментариев и уведомлений."""
+    removed = delete_in_batches(
+        Comment.all_objects.filter(post_id=post_id), batch_size)
+    removed += delete_in_batches(
+        Notification.objects.filter(post_id=post_id), batch_size,
+        on_batch=_forget_unread)
+    # Зависимых строк не осталось: каскад ничего не соберёт
+    Post.all_objects.filter(id=post_id).delete()
+    return removed + 1
@@ -0,0 +1,82 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Follow, Post
+
+
+FEED_KEY = 'feed:follow:{}'
+USER_TOKEN_KEY = 'feed:follow:{}:token'
+# Меняется при правке и удалении постов: сбрасывает все страницы сразу
+ALL_TOKEN_KEY = 'feed:follow:token'
+
+
+def _query(user_id):
+    return Post.objects.filter(author__following__user_id=user_id).for_feed()
+
+
+def first_page(user_id, size):
+    """Первая страница ленты подписок: посты и их общее число.
+
+    Повторный показ обходится одним get_many: страница читается вместе
+    с метками, при которых она была собрана. Новая метка пользователя
+    (новый пост автора, подписка, отписка) или общая метка (правка и
+    удаление постов) означает, что страницу надо собрать заново.
+    Сами страницы после записи не меняются, поэтому одновременные
+    обновления не теряются.
+    """
+    feed_key = FEED_KEY.format(user_id)
+    token_key = USER_TOKEN_KEY.format(user_id)
+    values = cache.get_many([feed_key, token_key, ALL_TOKEN_KEY])
+    # Метки читаются до запросов: сброс во время сборки не потеряется
+    tokens = (_current(values, token_key), _current(values, ALL_TOKEN_KEY))
+    entry = values.get(feed_key)
+    if (entry is not None and entry['tokens'] == tokens
+            and entry['size'] == size):
+        return entry
+    posts = list(_query(user_id)[:size])
+    count = len(posts)
+    if count == size:
+        count = _query(user_id).count()
+    entry = {'posts': posts, 'count': count, 'size': size, 'tokens': tokens}
+    cache.set(feed_key, entry, settings.FOLLOW_FEED_TTL)
+    return entry
+
+
+def _current(values, key):
+    """Метка из values; пропавшая из кеша заменяется новой.
+
+    Иначе после вытеснения метки старая страница совпала бы с ней снова.
+    """
+    token = values.get(key)
+    if token is None:
+        cache.add(key, _token(), settings.FOLLOW_FEED_TTL)
+        token = cache.get(key)
+    return token
+
+
+def _token():
+    return uuid.uuid4().hex
+
+
+def forget(user_ids):
+    """Сбрасывает страницы пользователей; они соберутся при показе."""
+    cache.set_many({
+        USER_TOKEN_KEY.format(user_id): _token() for user_id in user_ids
+    }, settings.FOLLOW_FEED_TTL)
+
+
+def post_created(author_id):
+    """Сбрасывает страницы подписчиков автора нового поста."""
+    forget(Follow.objects.filter(
+        author_id=author_id).values_list('user_id', flat=True))
+
+
+def posts_changed():
+    """Сбрасывает все страницы после правки или удаления постов.
+
+    Обходить подписчиков автора не нужно: страницы соберутся заново
+    при следующем показе.
+    """
+    cache.set(ALL_TOKEN_KEY, _token(), settings.FOLLOW_FEED_TTL)
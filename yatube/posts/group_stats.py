@@ -0,0 +1,110 @@
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.http import Http404
+
+from core import cache as coalesced_cache
+
+from .models import Group, Post
+
+
+GROUP_KEY = 'group:slug:{}'
+GROUPS_KEY = 'group:all'
+STATS_KEY = 'group:stats'
+TOP_AUTHORS = 3
+
+
+def _group_key(slug):
+    # slug приходит из запроса: в ключ идёт хеш, а не сама строка
+    return GROUP_KEY.format(hashlib.sha1(slug.encode()).hexdigest())
+
+
+def get_group(slug):
+    """Группа по slug; повторные обращения обходятся без запроса."""
+    key = _group_key(slug)
+    group = cache.get(key)
+    if group is None:
+        group = Group.objects.filter(slug=slug).first()
+        if group is None:
+            raise Http404('Группа не найдена')
+        cache.set(key, group, None)
+    return group
+
+
+def forget_group(slug):
+    cache.delete_many([_group_key(slug), GROUPS_KEY])
+
+
+def _empty():
+    return {'posts': 0, 'last_activity': None, 'authors': {}}
+
+
+def _compute():
+    stats = {}
+    rows = Post.objects.filter(group__isnull=False).values(
+        'group_id', 'author_id', 'author__username'
+    ).annotate(posts=Count('id'), last_activity=Max('pub_date'))
+    for row in rows:
+        group_stats = stats.setdefault(row['group_id'], _empty())
+        group_stats['posts'] += row['posts']
+        if (group_stats['last_activity'] is None
+                or row['last_activity'] > group_stats['last_activity']):
+            group_stats['last_activity'] = row['last_activity']
+        group_stats['authors'][row['author_id']] = [
+            row['author__username'], row['posts']]
+    return stats
+
+
+def get_stats():
+    # После сброса статистику пересчитывает один запрос, остальные
+    # показывают прежнюю
+    return coalesced_cache.get_or_set(STATS_KEY, _compute, None)
+
+
+def post_added(post):
+    """Учитывает новый пост без пересчёта статистики.
+
+    Если статистики нет или она устарела, она посчитается целиком при
+    следующем обращении.
+    """
+    username = post.author.username
+
+    def change(stats):
+        group_stats = stats.setdefault(post.group_id, _empty())
+        group_stats['posts'] += 1
+        group_stats['last_activity'] = post.pub_date
+        author = group_stats['authors'].setdefault(
+            post.author_id, [username, 0])
+        author[1] += 1
+        return stats
+
+    coalesced_cache.update(STATS_KEY, change, None)
+
+
+def invalidate_stats():
+    coalesced_cache.expire(STATS_KEY)
+
+
+def directory():
+    """Список групп со статистикой для страницы каталога."""
+    groups = cache.get(GROUPS_KEY)
+    if groups is None:
+        groups = list(Group.objects.order_by('title'))
+        cache.set(GROUPS_KEY, groups, None)
+    stats = get_stats()
+    rows = []
+    for group in groups:
+        group_stats = stats.get(group.id, _empty())
+        authors = sorted(
+            group_stats['authors'].values(),
+            key=lambda author: author[1],
+            reverse=True,
+        )
+        rows.append({
+            'group': group,
+            'posts': group_stats['posts'],
+            'last_activity': group_stats['last_activity'],
+            'top_authors': [name for name, _ in authors[:TOP_AUTHORS]],
+        })
+    return rows
@@ -0,0 +1,174 @@
+import logging
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Max, Min
+
+from .models import Follow, Post
+
+
+logger = logging.getLogger(__name__)
+
+_condition = threading.Condition()
+# Новые посты, замеченные опросом: (id, group_id, author_id)
+_events = deque()
+# id последнего поста, который видел опрос
+_last_id = 0
+# События с id не больше этого вытеснены из буфера
+_floor = 0
+# Сколько потоков сейчас занято ожиданием событий в этом процессе
+_streams = 0
+_poller = None
+_wake = threading.Event()
+
+
+def publish(post):
+    """Просит опрос этого процесса проверить таблицу постов сразу.
+
+    Источник событий — сама таблица постов: номер события совпадает с
+    id поста, поэтому клиенты других процессов увидят пост при
+    следующем опросе, через LIVE_POLL_INTERVAL секунд.
+    """
+    _wake.set()
+
+
+def acquire_stream(limit):
+    """Занимает место для потока; False, если все limit мест заняты.
+
+    Каждое соединение держит поток: под WSGI — поток воркера, под
+    ASGI — поток отдельного пула потоковых ответов.
+    """
+    global _streams
+    with _condition:
+        if _streams >= limit:
+            return False
+        _streams += 1
+        _condition.notify_all()
+    _start_poller()
+    return True
+
+
+def release_stream():
+    global _streams
+    with _condition:
+        _streams -= 1
+
+
+def _start_poller():
+    global _poller, _last_id
+    with _condition:
+        if _poller is not None:
+            return
+        # Отсчёт берётся до запроса первого клиента (Subscription), так
+        # что пост между ними не потеряется
+        _last_id = Post.objects.aggregate(
+            last_id=Max('id'))['last_id'] or 0
+        _poller = threading.Thread(
+            target=_poll_forever, name='live-poller', daemon=True)
+    _poller.start()
+
+
+def _poll_forever():
+    """Один опрос таблицы постов на процесс, сколько бы ни было клиентов."""
+    while True:
+        with _condition:
+            if not _streams:
+                # Слушателей нет: соединение не держим и базу не опрашиваем
+                connection.close()
+                while not _streams:
+                    _condition.wait()
+        _wake.wait(settings.LIVE_POLL_INTERVAL)
+        _wake.clear()
+        if not _streams:
+            continue
+        try:
+            _poll()
+        except Exception:
+            logger.exception('Не удалось проверить новые посты')
+
+
+def _poll():
+    global _last_id, _floor
+    rows = list(Post.objects.filter(id__gt=_last_id).order_by(
+        'id').values_list('id', 'group_id', 'author_id'))
+    if not rows:
+        return
+    with _condition:
+        _events.extend(rows)
+        while len(_events) > settings.LIVE_BUFFER_SIZE:
+            _floor = _events.popleft()[0]
+        _last_id = rows[-1][0]
+        _condition.notify_all()
+
+
+def _found(ids):
+    if not ids:
+        return None
+    return {'count': len(ids), 'first_id': min(ids), 'last_id': max(ids)}
+
+
+class Subscription:
+    """Новые посты одной ленты для одного клиента.
+
+    Создаётся после acquire_stream(). При подключении выполняется один
+    запрос за постами новее after, дальше клиент только разбирает
+    события общего опроса процесса.
+    """
+
+    def __init__(self, feed, after, group=None, user=None):
+        self.posts = Post.objects.all()
+        self.match = None
+        if feed == 'group':
+            self.posts = self.posts.filter(group=group)
+            self.match = lambda event: event[1] == group.id
+        elif feed == 'follow':
+            self.posts = self.posts.filter(author__following__user=user)
+            authors = set(Follow.objects.filter(user=user).values_list(
+                'author_id', flat=True))
+            self.match = lambda event: event[2] in authors
+        self.cursor = after
+        # Всё, что опрос уже видел, покрывает запрос при подключении:
+        # события буфера до этой отметки клиенту не нужны
+        seen = _last_id
+        self.pending = self._query()
+        self.cursor = max(self.cursor, seen)
+
+    def _query(self):
+        found = self.posts.filter(id__gt=self.cursor).aggregate(
+            count=Count('id'), first_id=Min('id'), last_id=Max('id'))
+        if not found['count']:
+            return None
+        self.cursor = found['last_id']
+        return found
+
+    def _from_events(self):
+        if self.cursor < _floor:
+            # Клиент отстал больше, чем на буфер: спрашиваем базу
+            return self._query()
+        ids = [
+            event[0] for event in _events
+            if event[0] > self.cursor
+            and (self.match is None or self.match(event))
+        ]
+        self.cursor = max(self.cursor, _last_id)
+        return _found(ids)
+
+    def wait(self, timeout):
+        """Ждёт до timeout секунд новых постов ленты.
+
+        Возвращает число и диапазон id новых постов или None.
+        """
+        if self.pending:
+            found, self.pending = self.pending, None
+            return found
+        deadline = time.monotonic() + timeout
+        with _condition:
+            while True:
+                found = self._from_events()
+                remaining = deadline - time.monotonic()
+                if found or remaining <= 0:
+                    return found
+                _condition.wait(remaining)
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from posts import archive
+
+
+class Command(BaseCommand):
+    help = 'Переносит старые посты и их комментарии в архивные таблицы'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=None,
+            help='Возраст поста в днях, после которого он уходит в архив',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Сколько постов переносить в одной транзакции',
+        )
+
+    def handle(self, *args, **options):
+        archived = archive.archive(options['days'], options['batch_size'])
+        self.stdout.write(f'Перенесено в архив постов: {archived}')
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import comment_queue
+
+
+class Command(BaseCommand):
+    help = 'Переносит комментарии из очереди на диске в базу данных'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Размер пачки для bulk_create',
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, опрашивая очередь',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Пауза между опросами очереди в секундах',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            created = comment_queue.drain(options['batch_size'])
+            if created:
+                self.stdout.write(f'Сохранено комментариев: {created}')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import notifications
+
+
+class Command(BaseCommand):
+    help = 'Рассылает подписчикам уведомления о новых постах'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Сколько подписчиков обрабатывать за один bulk_create',
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, проверяя новые посты',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5.0,
+            help='Пауза между проверками в секундах',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            created = notifications.fan_out(options['batch_size'])
+            if created:
+                self.stdout.write(f'Создано уведомлений: {created}')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import deletion
+
+
+class Command(BaseCommand):
+    help = 'Окончательно удаляет помеченные посты и комментарии'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Сколько зависимых строк удалять за один запрос',
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, проверяя новые удаления',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=60.0,
+            help='Пауза между проверками в секундах',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            removed = deletion.purge(options['batch_size'])
+            if removed:
+                self.stdout.write(f'Удалено строк: {removed}')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
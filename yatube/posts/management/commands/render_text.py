@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Comment, Post
+from posts.text import rerender
+
+
+class Command(BaseCommand):
+    help = (
+        'Перерисовывает HTML постов и комментариев после смены '
+        'версии Markdown-рендерера'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        posts = rerender(Post, with_excerpt=True, batch_size=batch_size)
+        comments = rerender(Comment, batch_size=batch_size)
+        self.stdout.write(
+            f'Перерисовано постов: {posts}, комментариев: {comments}')
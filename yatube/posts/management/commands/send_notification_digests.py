@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts import notifications
+
+
+class Command(BaseCommand):
+    help = ('Отправляет письма со сводкой непрочитанных уведомлений; '
+            'запускается по расписанию, например раз в день')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Сколько получателей обрабатывать за один проход',
+        )
+
+    def handle(self, *args, **options):
+        sent = notifications.send_digests(options['batch_size'])
+        self.stdout.write(f'Отправлено писем: {sent}')
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import warmup
+
+
+class Command(BaseCommand):
+    help = 'Заранее заполняет кеш самыми посещаемыми страницами'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', type=int, default=None,
+            help='Сколько первых страниц каждой ленты запрашивать',
+        )
+        parser.add_argument(
+            '--posts', type=int, default=None,
+            help='Скольким самым просматриваемым постам готовить миниатюры',
+        )
+        parser.add_argument(
+            '--threads', type=int, default=None,
+            help='Число потоков',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        warmed = warmup.warm(
+            options['pages'], options['posts'], options['threads'])
+        self.stdout.write(
+            f'Прогрето страниц и миниатюр: {warmed} '
+            f'за {time.monotonic() - started:.1f} с')
@@ -0,0 +1,53 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:14
+
+import re
+
+from django.db import migrations, models
+
+
+# Копия posts.text.make_excerpt на момент миграции: миграция не должна
+# меняться вместе с кодом приложения
+EXCERPT_LENGTH = 300
+SPACES = re.compile(r'\s+')
+
+
+def make_excerpt(text, length=EXCERPT_LENGTH):
+    plain = SPACES.sub(' ', text).strip()
+    if len(plain) <= length:
+        return plain, False
+    cut = plain[:length].rsplit(' ', 1)[0] or plain[:length]
+    return cut.rstrip(' .,;:!?-') + '…', True
+
+
+def fill_excerpts(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    posts = Post.objects.only('id', 'text').order_by('id')
+    batch = []
+    for post in posts.iterator():
+        post.excerpt, post.has_more = make_excerpt(post.text)
+        batch.append(post)
+        if len(batch) == 500:
+            Post.objects.bulk_update(batch, ['excerpt', 'has_more'])
+            batch = []
+    Post.objects.bulk_update(batch, ['excerpt', 'has_more'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_post_views'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False, verbose_name='Превью'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='has_more',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Текст длиннее превью'),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:15
+
+from django.db import migrations, models
+
+
+# HTML существующих записей здесь не отрисовывается: миграция не
+# зависит от кода рендерера. Записи с render_version=0 перерисовывает
+# команда render_text, а до неё — первый показ записи
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_post_excerpt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='render_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Версия отрисовки'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='HTML текста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='render_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Версия отрисовки'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='HTML текста'),
+        ),
+    ]
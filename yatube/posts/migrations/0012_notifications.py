@@ -0,0 +1,53 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:25
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def mark_existing_notified(apps, schema_editor):
+    # Уже опубликованные посты не должны разослаться как новые
+    Post = apps.get_model('posts', 'Post')
+    Post.objects.update(followers_notified=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0011_date_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='followers_notified',
+            field=models.BooleanField(db_index=True, default=False, editable=False, verbose_name='Подписчики оповещены'),
+        ),
+        migrations.RunPython(
+            mark_existing_notified, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата')),
+                ('is_read', models.BooleanField(default=False, verbose_name='Прочитано')),
+                ('emailed', models.BooleanField(default=False, verbose_name='Отправлено в дайджесте')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='posts.Post', verbose_name='Новый пост')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL, verbose_name='Получатель')),
+            ],
+            options={
+                'verbose_name': 'Уведомление',
+                'verbose_name_plural': 'Уведомления',
+                'ordering': ['-id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'is_read'], name='notification_unread'),
+        ),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(fields=('user', 'post'), name='unique_notification'),
+        ),
+    ]
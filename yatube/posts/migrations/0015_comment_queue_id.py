@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_soft_delete'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='queue_id',
+            field=models.UUIDField(blank=True, editable=False, null=True, unique=True, verbose_name='Номер в очереди'),
+        ),
+    ]
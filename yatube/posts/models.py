@@ -1,6 +1,10 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 
+from django.utils.safestring import mark_safe
+
+from .text import RENDER_VERSION, make_excerpt_from_html, render_markdown
+
 
 User = get_user_model()
 
@@ -14,14 +18,85 @@ class Group(models.Model):
         return self.title
 
 
-class Post(models.Model):
+class RenderedText(models.Model):
+    """HTML из Markdown поля text, отрисованный при сохранении."""
+    text_html = models.TextField(
+        'HTML текста',
+        blank=True,
+        editable=False
+    )
+    render_version = models.PositiveSmallIntegerField(
+        'Версия отрисовки',
+        default=0,
+        editable=False
+    )
+
+    class Meta:
+        abstract = True
+
+    def render_text(self):
+        self.text_html = render_markdown(self.text)
+        self.render_version = RENDER_VERSION
+
+    @property
+    def html(self):
+        # HTML старой версии перерисовывается один раз и сохраняется;
+        # обычно это заранее делает команда render_text
+        if self.render_version != RENDER_VERSION:
+            self.render_text()
+            type(self).objects.filter(pk=self.pk).update(**{
+                field: getattr(self, field)
+                for field in self.rendered_fields()
+            })
+        return mark_safe(self.text_html)
+
+    def save(self, *args, **kwargs):
+        self.render_text()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {
+                *update_fields, *self.rendered_fields()}
+        super().save(*args, **kwargs)
+
+    def rendered_fields(self):
+        return ['text_html', 'render_version']
+
+
+class LiveManager(models.Manager):
+    """Записи без пометки об удалении.
+
+    Удаление только ставит deleted_at; сами строки и всё, что от них
+    зависит, небольшими пачками убирает команда purge_deleted.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class PostQuerySet(models.QuerySet):
+    # Поля, которые нужны карточке поста в includes/article.html
+    FEED_FIELDS = (
+        'id', 'excerpt', 'has_more', 'pub_date', 'image',
+        'author_id', 'group_id',
+        'author__username', 'author__first_name', 'author__last_name',
+        'group__slug', 'group__title',
+    )
+
+    def for_feed(self):
+        """Посты для ленты без лишних столбцов поста и автора."""
+        return self.select_related('author', 'group').only(
+            *self.FEED_FIELDS)
+
+
+class Post(RenderedText):
     text = models.TextField(
         'Текст поста',
         help_text='Введите текст поста'
     )
     pub_date = models.DateTimeField(
         'Дата публикации',
-        auto_now_add=True
+        auto_now_add=True,
+        db_index=True
     )
     author = models.ForeignKey(
         User,
@@ -42,6 +117,39 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    views = models.PositiveIntegerField(
+        'Просмотры',
+        default=0,
+        editable=False
+    )
+    # Превью для ленты считается при сохранении, а не при каждом рендере
+    excerpt = models.TextField(
+        'Превью',
+        blank=True,
+        editable=False
+    )
+    has_more = models.BooleanField(
+        'Текст длиннее превью',
+        default=False,
+        editable=False
+    )
+    # Уведомления подписчикам рассылает фоновая команда notify_followers
+    followers_notified = models.BooleanField(
+        'Подписчики оповещены',
+        default=False,
+        editable=False,
+        db_index=True
+    )
+    deleted_at = models.DateTimeField(
+        'Удалён',
+        blank=True,
+        null=True,
+        editable=False,
+        db_index=True
+    )
+
+    objects = LiveManager.from_queryset(PostQuerySet)()
+    all_objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ['-pub_date']
@@ -51,15 +159,23 @@ class Post(models.Model):
     def __str__(self):
         return self.text[:15]
 
+    def render_text(self):
+        super().render_text()
+        self.excerpt, self.has_more = make_excerpt_from_html(self.text_html)
 
-class Comment(models.Model):
+    def rendered_fields(self):
+        return [*super().rendered_fields(), 'excerpt', 'has_more']
+
+
+class Comment(RenderedText):
     text = models.TextField(
         help_text='Введите текст комментария',
         verbose_name='Текст комментария'
     )
     created = models.DateTimeField(
         verbose_name='Дата публикации',
-        auto_now_add=True
+        auto_now_add=True,
+        db_index=True
     )
     author = models.ForeignKey(
         User,
@@ -73,6 +189,25 @@ class Comment(models.Model):
         related_name='comments',
         verbose_name='Комментарий поста',
     )
+    deleted_at = models.DateTimeField(
+        'Удалён',
+        blank=True,
+        null=True,
+        editable=False,
+        db_index=True
+    )
+    # Номер записи в очереди comment_queue: повторная обработка того же
+    # файла после сбоя не создаёт комментарий второй раз
+    queue_id = models.UUIDField(
+        'Номер в очереди',
+        blank=True,
+        null=True,
+        unique=True,
+        editable=False
+    )
+
+    objects = LiveManager()
+    all_objects = models.Manager()
 
     class Meta:
         ordering = ['-created']
@@ -107,3 +242,100 @@ class Follow(models.Model):
 
     def __str__(self):
         return f'{self.user} --> {self.author}'
+
+
+class Notification(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Получатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Новый пост',
+    )
+    created = models.DateTimeField('Дата', auto_now_add=True)
+    is_read = models.BooleanField('Прочитано', default=False)
+    emailed = models.BooleanField('Отправлено в дайджесте', default=False)
+
+    class Meta:
+        ordering = ['-id']
+        verbose_name = 'Уведомление'
+        verbose_name_plural = 'Уведомления'
+        constraints = [models.UniqueConstraint(
+            fields=['user', 'post'],
+            name='unique_notification')
+        ]
+        indexes = [models.Index(
+            fields=['user', 'is_read'],
+            name='notification_unread',
+        )]
+
+    def __str__(self):
+        return f'{self.user} <-- {self.post_id}'
+
+
+class ArchivedPost(RenderedText):
+    """Старый пост, перенесённый командой archive_posts из posts_post.
+
+    id совпадает с исходным, поэтому ссылки на пост продолжают работать.
+    """
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('Текст поста')
+    pub_date = models.DateTimeField('Дата публикации', db_index=True)
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        related_name='archived_posts',
+        blank=True,
+        null=True,
+        verbose_name='Группа'
+    )
+    image = models.ImageField('Картинка', upload_to='posts/', blank=True)
+    views = models.PositiveIntegerField('Просмотры', default=0)
+    excerpt = models.TextField('Превью', blank=True)
+    has_more = models.BooleanField('Текст длиннее превью', default=False)
+    archived = models.DateTimeField('Перенесён в архив', auto_now_add=True)
+
+    class Meta:
+        ordering = ['-pub_date']
+        verbose_name = 'Архивный пост'
+        verbose_name_plural = 'Архивные посты'
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class ArchivedComment(RenderedText):
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('Текст комментария')
+    created = models.DateTimeField('Дата публикации')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+        verbose_name='Автор'
+    )
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments',
+        verbose_name='Комментарий поста',
+    )
+
+    class Meta:
+        ordering = ['-created']
+        verbose_name = 'Архивный комментарий'
+        verbose_name_plural = 'Архивные комментарии'
+
+    def __str__(self):
+        return self.text[:15]
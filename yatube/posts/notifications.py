@@ -0,0 +1,130 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+from .models import Follow, Notification, Post
+
+
+UNREAD_KEY = 'notifications:unread:{}'
+# Сколько новых постов разбирать за один запуск рассылки
+POSTS_PER_RUN = 100
+
+
+def forget_unread(user_ids):
+    cache.delete_many([UNREAD_KEY.format(user_id) for user_id in user_ids])
+
+
+def fan_out(batch_size=None):
+    """Рассылает подписчикам уведомления о новых постах их авторов.
+
+    Подписчики перебираются пачками по batch_size, каждая пачка
+    записывается одним bulk_create. Пост помечается разосланным только
+    после последней пачки; повторный запуск после сбоя не создаст
+    дублей благодаря уникальности (user, post).
+    Возвращает число созданных уведомлений.
+    """
+    batch_size = batch_size or settings.NOTIFICATIONS_BATCH_SIZE
+    posts = Post.objects.filter(followers_notified=False).order_by(
+        'id').values_list('id', 'author_id')[:POSTS_PER_RUN]
+    created = 0
+    for post_id, author_id in posts:
+        last_user_id = 0
+        while True:
+            followers = list(Follow.objects.filter(
+                author_id=author_id, user_id__gt=last_user_id
+            ).order_by('user_id').values_list('user_id', flat=True)[
+                :batch_size])
+            if not followers:
+                break
+            Notification.objects.bulk_create(
+                [Notification(user_id=user_id, post_id=post_id)
+                 for user_id in followers],
+                ignore_conflicts=True,
+            )
+            # Счётчики пересчитаются при следующем показе
+            forget_unread(followers)
+            created += len(followers)
+            last_user_id = followers[-1]
+        Post.objects.filter(id=post_id).update(followers_notified=True)
+    return created
+
+
+def unread_count(user):
+    """Число непрочитанных уведомлений; между изменениями берётся из кеша."""
+    key = UNREAD_KEY.format(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(
+            user=user, is_read=False, post__deleted_at__isnull=True).count()
+        cache.set(key, count, None)
+    return count
+
+
+def mark_read(user, ids):
+    """Отмечает прочитанными показанные уведомления ids.
+
+    Уведомления с других страниц остаются непрочитанными, счётчик
+    уменьшается на число отмеченных.
+    """
+    marked = Notification.objects.filter(
+        user=user, id__in=ids, is_read=False).update(is_read=True)
+    if marked:
+        try:
+            cache.decr(UNREAD_KEY.format(user.pk), marked)
+        except ValueError:
+            # Счётчика нет в кеше: он будет посчитан при показе
+            pass
+
+
+def _digest(user, notifications):
+    body = render_to_string('posts/notification_digest.txt', {
+        'user': user,
+        'inbox_url': settings.SITE_URL + reverse('posts:notifications'),
+        'items': [
+            (notification.post, settings.SITE_URL + reverse(
+                'posts:post_detail', kwargs={'post_id': notification.post.id}))
+            for notification in notifications
+        ],
+    })
+    return EmailMessage(
+        f'Новые записи авторов, на которых вы подписаны: '
+        f'{len(notifications)}',
+        body,
+        to=[user.email],
+    )
+
+
+def send_digests(batch_size=None):
+    """Отправляет письма со сводкой непрочитанных уведомлений.
+
+    Каждое уведомление попадает в письмо один раз. Письма уходят
+    через EMAIL_BACKEND, то есть в очередь core.mail.
+    Возвращает число писем.
+    """
+    batch_size = batch_size or settings.NOTIFICATIONS_BATCH_SIZE
+    pending = Notification.objects.filter(
+        is_read=False, emailed=False, post__deleted_at__isnull=True
+    ).exclude(user__email='')
+    user_ids = list(
+        pending.order_by('user_id').values_list('user_id', flat=True)
+        .distinct())
+    connection = get_connection()
+    sent = 0
+    for start in range(0, len(user_ids), batch_size):
+        chunk = pending.filter(user_id__in=user_ids[start:start + batch_size])
+        notifications = list(chunk.select_related(
+            'user', 'post__author').order_by('user_id', 'id'))
+        if not notifications:
+            continue
+        by_user = {}
+        for notification in notifications:
+            by_user.setdefault(notification.user, []).append(notification)
+        sent += connection.send_messages([
+            _digest(user, items) for user, items in by_user.items()
+        ]) or 0
+        chunk.filter(
+            id__lte=max(notification.id for notification in notifications)
+        ).update(emailed=True)
+    return sent
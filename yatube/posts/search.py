@@ -0,0 +1,73 @@
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+
+FTS_TABLE = 'posts_post_fts'
+
+# Внешний (external content) индекс FTS5: текст хранится только в
+# posts_post, индекс обновляют триггеры
+INSTALL_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        text, content='posts_post', content_rowid='id',
+        tokenize='unicode61')""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert
+        AFTER INSERT ON posts_post BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete
+        AFTER DELETE ON posts_post BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+            VALUES ('delete', old.id, old.text);
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update
+        AFTER UPDATE OF text ON posts_post BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+            VALUES ('delete', old.id, old.text);
+            INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+        END""",
+]
+REBUILD_SQL = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+OBJECTS = {FTS_TABLE, *(
+    f'{FTS_TABLE}_{event}' for event in ('insert', 'delete', 'update'))}
+
+
+def install(using=connection):
+    """Создаёт индекс и триггеры, если их нет; только для SQLite.
+
+    Вызывается после каждого migrate: SQLite пересоздаёт таблицу
+    posts_post при изменении схемы, и триггеры пропадают вместе с ней.
+    В этом случае индекс перестраивается целиком, чтобы не разойтись
+    с таблицей. Возвращает True, если что-то пришлось создать.
+    """
+    if using.vendor != 'sqlite':
+        return False
+    with using.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name LIKE %s",
+            (FTS_TABLE + '%',))
+        if OBJECTS <= {name for name, in cursor.fetchall()}:
+            return False
+        for sql in INSTALL_SQL:
+            cursor.execute(sql)
+        cursor.execute(REBUILD_SQL)
+    return True
+
+
+def is_installed(using=connection):
+    return (using.vendor == 'sqlite'
+            and FTS_TABLE in using.introspection.table_names())
+
+
+def match_expression(query):
+    """Запрос пользователя в синтаксисе MATCH: все слова, по префиксу."""
+    return ' '.join(
+        '"{}"*'.format(term.replace('"', '""')) for term in query.split()
+    )
+
+
+def filter_posts(queryset, query):
+    """Оставляет в queryset посты, текст которых подходит под запрос."""
+    return queryset.filter(id__in=RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        (match_expression(query),),
+    ))
@@ -0,0 +1,71 @@
+from functools import partial
+
+from django.db import connections, transaction
+from django.db.models.signals import (post_delete, post_migrate, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+
+from . import feed_cache, group_stats, live, search, trending
+from .models import Comment, Follow, Group, Post
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        trending.comment_added(instance.post_id)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        trending.follower_added(instance.author_id)
+        feed_cache.forget([instance.user_id])
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(partial(live.publish, instance))
+        # Подписчики увидят пост сразу, не дожидаясь notify_followers
+        transaction.on_commit(
+            partial(feed_cache.post_created, instance.author_id))
+    else:
+        # Правка сбрасывает сохранённые страницы всех лент
+        transaction.on_commit(feed_cache.posts_changed)
+    if created and instance.group_id:
+        # Откат транзакции не должен оставить пост в статистике
+        transaction.on_commit(partial(group_stats.post_added, instance))
+    elif not created:
+        # При редактировании мог смениться автор или группа
+        group_stats.invalidate_stats()
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    group_stats.invalidate_stats()
+
+
+@receiver(pre_save, sender=Group)
+def group_changing(sender, instance, **kwargs):
+    if instance.pk:
+        old_slug = Group.objects.filter(
+            pk=instance.pk).values_list('slug', flat=True).first()
+        if old_slug:
+            group_stats.forget_group(old_slug)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, **kwargs):
+    group_stats.forget_group(instance.slug)
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    group_stats.forget_group(instance.slug)
+    group_stats.invalidate_stats()
+
+
+@receiver(post_migrate)
+def migrated(sender, using, **kwargs):
+    if sender.name == 'posts':
+        search.install(connections[using])
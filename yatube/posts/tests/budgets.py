@@ -0,0 +1,64 @@
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.db import connection
+from django.db.models.signals import post_init
+from django.test.utils import CaptureQueriesContext
+
+
+NUMBERS = re.compile(r'\b\d+\b')
+STRINGS = re.compile(r"'[^']*'")
+
+
+def normalize(sql):
+    """SQL без конкретных значений: одинаковые запросы N+1 совпадают."""
+    return NUMBERS.sub('?', STRINGS.sub('?', sql))
+
+
+def describe(queries):
+    counts = Counter(normalize(query['sql']) for query in queries)
+    lines = []
+    for sql, count in counts.most_common():
+        marker = f'x{count}' if count > 1 else '  '
+        lines.append(f'  {marker:>4} {sql}')
+    return '\n'.join(lines)
+
+
+class QueryBudgetMixin:
+    """Проверка стоимости запроса: число SQL-запросов, загруженных
+    объектов моделей и время выполнения."""
+
+    @contextmanager
+    def assertBudget(self, queries, rows, seconds):
+        loaded = []
+
+        def count_row(sender, **kwargs):
+            loaded.append(sender)
+
+        post_init.connect(count_row)
+        start = time.perf_counter()
+        try:
+            with CaptureQueriesContext(connection) as context:
+                yield
+        finally:
+            post_init.disconnect(count_row)
+        elapsed = time.perf_counter() - start
+        problems = []
+        if len(context.captured_queries) > queries:
+            problems.append(
+                f'SQL-запросов {len(context.captured_queries)}, '
+                f'бюджет {queries}:\n' + describe(context.captured_queries))
+        if len(loaded) > rows:
+            by_model = Counter(model.__name__ for model in loaded)
+            problems.append(
+                f'загружено объектов {len(loaded)}, бюджет {rows}: '
+                + ', '.join(f'{name} x{count}'
+                            for name, count in by_model.most_common()))
+        if elapsed > seconds:
+            problems.append(
+                f'время {elapsed * 1000:.0f} мс, '
+                f'бюджет {seconds * 1000:.0f} мс')
+        if problems:
+            self.fail('Превышен бюджет:\n' + '\n'.join(problems))
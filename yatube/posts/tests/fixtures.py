@@ -0,0 +1,36 @@
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00'
+    b'\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
+    b'\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+
+
+def uploaded_gif(name='small.gif'):
+    """Картинка 1x1 для полей ImageField."""
+    return SimpleUploadedFile(
+        name=name,
+        content=SMALL_GIF,
+        content_type='image/gif'
+    )
+
+
+class MediaTestCase(TestCase):
+    """TestCase, который убирает загруженные файлы после своих тестов.
+
+    В профиле test файлы хранятся в памяти (core.storage.InMemoryStorage),
+    так что имена картинок не пересекаются между классами тестов.
+    """
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        clear = getattr(default_storage, 'clear', None)
+        if clear is not None:
+            clear()
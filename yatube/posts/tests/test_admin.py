@@ -0,0 +1,94 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.admin import CappedCountPaginator
+from posts.models import Comment, Follow, Group, Post
+
+
+User = get_user_model()
+
+
+class AdminChangelistTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def add_rows(self, count):
+        for _ in range(count):
+            number = User.objects.count()
+            author = User.objects.create_user(username=f'author_{number}')
+            post = Post.objects.create(
+                author=author, group=self.group, text=f'Пост {number}')
+            Comment.objects.create(author=author, post=post, text='Текст')
+            Follow.objects.create(user=self.admin, author=author)
+
+    def queries_for(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """Число запросов списков в админке не зависит от числа строк."""
+        urls = [
+            reverse(f'admin:posts_{model}_changelist')
+            for model in ('post', 'comment', 'follow')
+        ]
+        self.add_rows(2)
+        before = [self.queries_for(url) for url in urls]
+        self.add_rows(5)
+        after = [self.queries_for(url) for url in urls]
+        self.assertEqual(before, after)
+
+    def test_post_search_uses_full_text_index(self):
+        """Поиск постов в админке находит слова по префиксу."""
+        Post.objects.create(
+            author=self.admin, text='Большие Таблицы в админке')
+        Post.objects.create(author=self.admin, text='Другой текст')
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'табл'})
+        self.assertEqual(
+            [post.text for post in response.context['cl'].result_list],
+            ['Большие Таблицы в админке']
+        )
+
+    def test_blank_post_search_shows_all_posts(self):
+        """Запрос из пробелов не ломает поиск и ничего не отфильтровывает."""
+        self.add_rows(2)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': ' '})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            len(response.context['cl'].result_list), Post.objects.count())
+
+    def test_paginator_count_is_capped(self):
+        """Пагинатор не считает строки дальше предела."""
+        self.add_rows(3)
+        paginator = CappedCountPaginator(Post.objects.all(), 1)
+        paginator.COUNT_LIMIT = 2
+        self.assertEqual(paginator.count, 2)
+
+    def test_delete_only_marks_post(self):
+        """Удаление поста из админки не трогает комментарии сразу."""
+        self.add_rows(1)
+        post = Post.objects.get()
+        response = self.client.post(
+            reverse('admin:posts_post_delete', args=[post.pk]),
+            {'post': 'yes'})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Post.objects.exists())
+        self.assertIsNotNone(Post.all_objects.get().deleted_at)
+        self.assertEqual(Comment.all_objects.count(), 1)
@@ -0,0 +1,100 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .budgets import QueryBudgetMixin
+from .. import notifications, view_counter
+from ..models import Comment, Follow, Group, Post, User
+from ..urls import urlpatterns
+
+
+# Имя URL -> (метод, SQL-запросов, загруженных объектов, секунд).
+# Объекты считаются вместе со связанными: пост с автором и группой — три
+BUDGETS = {
+    'index': ('get', 5, 32, 0.5),
+    'popular': ('get', 4, 32, 0.5),
+    'group_index': ('get', 4, 4, 0.5),
+    'group_list': ('get', 5, 33, 0.5),
+    'profile': ('get', 6, 33, 0.5),
+    'post_detail': ('get', 5, 26, 0.5),
+    'create_post': ('get', 3, 4, 0.5),
+    'update_post': ('get', 5, 5, 0.5),
+    'add_comment': ('post', 4, 4, 0.5),
+    'follow_index': ('get', 5, 32, 0.5),
+    'notifications': ('get', 5, 32, 0.5),
+    # Поток событий не читается тестом: учитывается только подключение
+    'live_feed': ('get', 0, 0, 0.5),
+    'profile_follow': ('get', 4, 4, 0.5),
+    'profile_unfollow': ('get', 4, 3, 0.5),
+}
+# Страницы, которые открывает подписчик, а не автор постов
+READER_VIEWS = {
+    'follow_index', 'notifications', 'profile_follow', 'profile_unfollow'}
+POSTS = 15
+COMMENTS = 10
+
+
+# Просмотры копятся в памяти и пишутся раз в час: post_detail не
+# получает лишний UPDATE в зависимости от того, когда прошла запись
+@override_settings(RATELIMIT_ENABLED=False, POST_VIEWS_FLUSH_INTERVAL=3600)
+class ViewBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        posts = [
+            Post(author=cls.author, group=cls.group, text=f'Пост {number}')
+            for number in range(POSTS)
+        ]
+        for post in posts:
+            post.render_text()
+        Post.objects.bulk_create(posts)
+        cls.post = Post.objects.first()
+        for number in range(COMMENTS):
+            Comment.objects.create(
+                author=cls.reader, post=cls.post, text=f'Комментарий {number}')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        notifications.fan_out()
+        cls.kwargs = {
+            'slug': cls.group.slug,
+            'username': cls.author.username,
+            'post_id': cls.post.id,
+        }
+
+    def setUp(self):
+        cache.clear()
+        view_counter.flush()
+        self.client = Client()
+        self.client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def url(self, pattern):
+        kwargs = {
+            name: self.kwargs[name] for name in pattern.pattern.converters
+        }
+        return reverse(f'posts:{pattern.name}', kwargs=kwargs)
+
+    def test_every_url_has_budget(self):
+        """Для каждого URL из posts/urls.py задан бюджет."""
+        names = {pattern.name for pattern in urlpatterns}
+        self.assertEqual(names - set(BUDGETS), set())
+
+    def test_views_fit_budget(self):
+        """Страницы укладываются в бюджет запросов, объектов и времени."""
+        for pattern in urlpatterns:
+            method, queries, rows, seconds = BUDGETS[pattern.name]
+            client = (
+                self.reader_client if pattern.name in READER_VIEWS
+                else self.client
+            )
+            with self.subTest(url=pattern.name):
+                with self.assertBudget(queries, rows, seconds):
+                    getattr(client, method)(
+                        self.url(pattern), {'text': 'Комментарий'}
+                        if method == 'post' else None)
@@ -1,20 +1,12 @@
-import shutil
-import tempfile
-
-from django.conf import settings
-from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase, override_settings
+from django.test import Client
 from django.urls import reverse
 
 from posts.forms import PostForm
 from posts.models import Post, Group, User
+from .fixtures import MediaTestCase, uploaded_gif
 
 
-TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
-
-
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
-class PostFormTest(TestCase):
+class PostFormTest(MediaTestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -43,11 +35,6 @@ class PostFormTest(TestCase):
         cls.authorized_client = Client()
         cls.authorized_client.force_login(cls.author)
 
-    @classmethod
-    def tearDownClass(cls):
-        super().tearDownClass()
-        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
-
     def test_form_create(self):
         """Валидная форма создает пост."""
         post_count = Post.objects.count()
@@ -114,18 +101,7 @@ class PostFormTest(TestCase):
         """При отправке поста с картинкой через форму PostForm
         создаётся запись в базе данных.
         """
-        small_gif = (
-            b'\x47\x49\x46\x38\x39\x61\x01\x00'
-            b'\x01\x00\x00\x00\x00\x21\xf9\x04'
-            b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
-            b'\x00\x00\x01\x00\x01\x00\x00\x02'
-            b'\x02\x4c\x01\x00\x3b'
-        )
-        uploaded = SimpleUploadedFile(
-            name='small.gif',
-            content=small_gif,
-            content_type='image/gif'
-        )
+        uploaded = uploaded_gif()
         form_data = {
             'text': 'Тестовый текст',
             'group': self.group.id,
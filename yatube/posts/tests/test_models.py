@@ -1,7 +1,12 @@
+from io import StringIO
+from unittest import mock
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 
-from ..models import Group, Post
+from ..models import Comment, Group, Post
+from ..text import EXCERPT_LENGTH, RENDER_VERSION
 
 User = get_user_model()
 
@@ -51,3 +56,67 @@ class PostModelTest(TestCase):
             with self.subTest(field=field):
                 self.assertEqual(
                     post._meta.get_field(field).help_text, expected_value)
+
+    def test_excerpt_is_stored_on_save(self):
+        """Превью короткого поста совпадает с текстом."""
+        post = PostModelTest.post
+        self.assertEqual(post.excerpt, post.text)
+        self.assertFalse(post.has_more)
+
+    def test_long_text_excerpt(self):
+        """Длинный текст обрезается по границе слова."""
+        post = PostModelTest.post
+        post.text = 'слово ' * 100
+        post.save(update_fields=['text'])
+        post.refresh_from_db()
+        self.assertTrue(post.has_more)
+        self.assertLessEqual(len(post.excerpt), EXCERPT_LENGTH + 1)
+        self.assertTrue(post.excerpt.endswith('слово…'))
+
+
+class RenderedTextTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='**Жирный** и [ссылка](https://example.com)\n\n<b>html</b>'
+        )
+
+    def test_markdown_rendered_on_save(self):
+        """Markdown отрисовывается при сохранении, сырой HTML экранируется."""
+        self.assertEqual(
+            self.post.text_html,
+            '<p><strong>Жирный</strong> и <a href="https://example.com" '
+            'rel="nofollow noopener">ссылка</a></p>\n'
+            '<p>&lt;b&gt;html&lt;/b&gt;</p>'
+        )
+        self.assertEqual(self.post.render_version, RENDER_VERSION)
+        self.assertEqual(self.post.excerpt, 'Жирный и ссылка <b>html</b>')
+
+    def test_page_view_does_not_render(self):
+        """Актуальный HTML отдаётся без повторной отрисовки."""
+        with self.assertNumQueries(0):
+            self.assertEqual(self.post.html, self.post.text_html)
+
+    def test_stale_html_rerendered_by_command(self):
+        """Команда render_text перерисовывает HTML старой версии."""
+        comment = Comment.objects.create(
+            author=self.user, post=self.post, text='*курсив*')
+        Comment.objects.update(text_html='', render_version=0)
+        Post.objects.update(text_html='', render_version=0)
+        call_command('render_text', stdout=StringIO())
+        comment.refresh_from_db()
+        self.assertEqual(comment.text_html, '<p><em>курсив</em></p>')
+        self.assertEqual(
+            Post.objects.filter(render_version=RENDER_VERSION).count(), 1)
+
+    def test_lazy_rerender_saves_excerpt(self):
+        """Перерисовка при показе сохраняет и превью поста."""
+        Post.objects.update(excerpt='Старое превью')
+        with mock.patch('posts.models.RENDER_VERSION', RENDER_VERSION + 1):
+            Post.objects.get(pk=self.post.pk).html
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.render_version, RENDER_VERSION + 1)
+        self.assertEqual(post.excerpt, 'Жирный и ссылка <b>html</b>')
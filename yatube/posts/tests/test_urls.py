@@ -1,9 +1,12 @@
+import threading
 from http import HTTPStatus
 
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
+from core.ratelimit import take
 from posts.models import Group, Post
 
 
@@ -111,3 +114,62 @@ class URLTests(TestCase):
     def test_page_404(self):
         response = self.guest_client.get('/unexisting_page/')
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+@override_settings(RATELIMITS={
+    'post_create': (2, 60),
+    'add_comment': (2, 60),
+    'profile_follow': (2, 60),
+})
+class RateLimitTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_user')
+        cls.author = User.objects.create_user(username='test_author')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_too_many_posts_return_429(self):
+        """Превышение лимита возвращает 429 с заголовком Retry-After."""
+        for _ in range(2):
+            response = self.authorized_client.post(
+                '/create/', data={'text': 'Текст'})
+            self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        response = self.authorized_client.post(
+            '/create/', data={'text': 'Текст'})
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertEqual(Post.objects.count(), 2)
+
+    def test_get_requests_are_not_limited(self):
+        """Открытие формы не расходует лимит."""
+        for _ in range(3):
+            response = self.authorized_client.get('/create/')
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_limits_are_per_user(self):
+        """Лимит одного пользователя не влияет на другого."""
+        for _ in range(3):
+            self.authorized_client.get('/profile/test_author/follow/')
+        other_client = Client()
+        other_client.force_login(self.author)
+        response = other_client.get('/profile/test_user/follow/')
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    def test_concurrent_requests_share_tokens(self):
+        """Одновременные запросы не получают больше токенов, чем есть."""
+        results = []
+
+        def request():
+            results.append(take('post_create', 'ip:127.0.0.1', now=0))
+
+        threads = [threading.Thread(target=request) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results.count(0), 2)
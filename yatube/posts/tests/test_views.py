@@ -1,22 +1,41 @@
+import fcntl
+import json
+import os
 import shutil
+import subprocess
+import sys
 import tempfile
+import threading
+import time
+import warnings
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+from unittest import mock
 
 from django.conf import settings
 from django import forms
 from django.urls import reverse
-from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase, override_settings
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.core import mail
 from django.core.cache import cache
+from django.core.cache.backends.base import CacheKeyWarning
+from django.core.cache.utils import make_template_fragment_key
+from django.core.management import call_command
+from django.db import DatabaseError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
+from .. import (archive, comment_queue, deletion, feed_cache, group_stats,
+                live, notifications, trending, view_counter)
 from ..forms import PostForm
-from ..models import Group, Post, User, Comment, Follow
+from ..models import (ArchivedComment, ArchivedPost, Group, Post, User,
+                      Comment, Follow, Notification)
+from .fixtures import MediaTestCase, uploaded_gif
 
 
-TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
-
-
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
-class ViewsTests(TestCase):
+class ViewsTests(MediaTestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -32,18 +51,7 @@ class ViewsTests(TestCase):
             slug='test_slug_1',
             description='Тестовое описание',
         )
-        small_gif = (
-            b'\x47\x49\x46\x38\x39\x61\x01\x00'
-            b'\x01\x00\x00\x00\x00\x21\xf9\x04'
-            b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
-            b'\x00\x00\x01\x00\x01\x00\x00\x02'
-            b'\x02\x4c\x01\x00\x3b'
-        )
-        cls.uploaded = SimpleUploadedFile(
-            name='small.gif',
-            content=small_gif,
-            content_type='image/gif'
-        )
+        cls.uploaded = uploaded_gif()
         cls.post = Post.objects.create(
             author=cls.author,
             group=cls.group,
@@ -67,11 +75,6 @@ class ViewsTests(TestCase):
             ),
         ]
 
-    @classmethod
-    def tearDownClass(cls):
-        super().tearDownClass()
-        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
-
     def setUp(self):
         # Создаем неавторизованный клиент
         self.guest_client = Client()
@@ -356,6 +359,16 @@ class PaginatorViewsTest(TestCase):
         ]
         cls.post = Post.objects.bulk_create(objects)
 
+    def test_feed_loads_only_card_columns(self):
+        """Лента не загружает лишние столбцы и не делает
+        дополнительных запросов при выводе карточек."""
+        cache.clear()
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('posts:index'))
+        post = response.context['page_obj'][0]
+        self.assertIn('password', post.author.get_deferred_fields())
+        self.assertIn('description', post.group.get_deferred_fields())
+
     def test_first_page_contains_ten_records(self):
         """Проверка: количество постов на первой странице равно 10."""
         response = self.client.get(reverse('posts:index'))
@@ -397,3 +410,741 @@ class PaginatorViewsTest(TestCase):
             {'page': 2}
         )
         self.assertEqual(len(response.context['page_obj']), 3)
+
+
+class BufferedCommentTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.queue_dir = tempfile.mkdtemp()
+        cls.settings = override_settings(
+            COMMENTS_BUFFERED=True, COMMENT_QUEUE_DIR=cls.queue_dir)
+        cls.settings.enable()
+        cls.author = User.objects.create_user(username='test_user')
+        cls.reader = User.objects.create_user(username='test_reader')
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Тестовый заголовок',
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        shutil.rmtree(cls.queue_dir, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        shutil.rmtree(self.queue_dir, ignore_errors=True)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.id})
+
+    def add_comment(self, text):
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.id}),
+            data={'text': text}
+        )
+
+    def test_comment_is_queued_and_shown_to_author(self):
+        """Комментарий попадает в очередь, но автор видит его сразу."""
+        self.add_comment('Комментарий из очереди')
+        self.assertFalse(Comment.objects.exists())
+        response = self.authorized_client.get(self.url)
+        self.assertEqual(
+            response.context['pending_comments'][0].text,
+            'Комментарий из очереди'
+        )
+        response = self.reader_client.get(self.url)
+        self.assertEqual(response.context['pending_comments'], [])
+
+    def test_pending_comment_is_rendered_like_saved(self):
+        """Комментарий из очереди отрисовывается так же, как сохранённый."""
+        self.add_comment('**Важно** <script>')
+        response = self.authorized_client.get(self.url)
+        self.assertContains(response, '<strong>Важно</strong> &lt;script&gt;')
+
+    def test_drain_saves_comments_once(self):
+        """Команда drain_comments сохраняет очередь в базу."""
+        self.add_comment('Первый')
+        self.add_comment('Второй')
+        call_command('drain_comments', batch_size=1, stdout=StringIO())
+        self.assertEqual(
+            set(Comment.objects.values_list('text', flat=True)),
+            {'Первый', 'Второй'}
+        )
+        call_command('drain_comments', stdout=StringIO())
+        self.assertEqual(Comment.objects.count(), 2)
+        response = self.authorized_client.get(self.url)
+        self.assertEqual(response.context['pending_comments'], [])
+
+    def test_drain_after_crash_does_not_duplicate(self):
+        """Пачка, записанная до сбоя, при повторной обработке пропускается."""
+        self.add_comment('Первый')
+        self.add_comment('Второй')
+        with mock.patch.object(comment_queue.os, 'remove',
+                               side_effect=OSError):
+            with self.assertRaises(OSError):
+                comment_queue.drain(batch_size=1)
+        self.assertEqual(Comment.objects.count(), 2)
+        self.assertEqual(comment_queue.drain(), 0)
+        self.assertEqual(Comment.objects.count(), 2)
+
+    def test_file_of_running_worker_is_skipped(self):
+        """Файл, который обрабатывает другой процесс, не забирается."""
+        self.add_comment('Комментарий')
+        busy = comment_queue._path(
+            f'{comment_queue.QUEUE_FILE}.1.0{comment_queue.PROCESSING_SUFFIX}')
+        os.rename(comment_queue._path(comment_queue.QUEUE_FILE), busy)
+        with open(busy, 'rb') as queue:
+            fcntl.flock(queue, fcntl.LOCK_EX)
+            self.assertEqual(comment_queue.drain(), 0)
+        # Процесс завершился, не удалив файл: его забирает следующий
+        self.assertEqual(comment_queue.drain(), 1)
+
+
+@override_settings(POST_VIEWS_FLUSH_INTERVAL=3600)
+class PostViewsCounterTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Просмотры из других тестов относятся к уже удалённым постам
+        view_counter.flush()
+        cls.author = User.objects.create_user(username='test_user')
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Тестовый заголовок',
+        )
+
+    def setUp(self):
+        self.url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.id})
+
+    def test_views_are_batched(self):
+        """Просмотры копятся в памяти и записываются одним обновлением."""
+        for _ in range(3):
+            response = self.client.get(self.url)
+        self.assertEqual(response.context['post'].views, 3)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 0)
+        self.assertEqual(view_counter.flush(), 3)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 3)
+
+    def test_background_flush_without_requests(self):
+        """Фоновый поток записывает просмотры и без новых запросов."""
+        view_counter.record(self.post.id)
+        # Второй вызов sleep прерывает бесконечный цикл потока
+        sleep = mock.patch.object(
+            view_counter.time, 'sleep', side_effect=[None, KeyboardInterrupt])
+        with sleep, mock.patch.object(view_counter, 'connection'):
+            with self.assertRaises(KeyboardInterrupt):
+                view_counter._flush_periodically()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 1)
+
+    def exit_flushes(self, start):
+        """Сколько раз процесс записал просмотры при выходе."""
+        script = (
+            'import django; django.setup()\n'
+            'from posts import view_counter\n'
+            'view_counter.flush = lambda: print("flush")\n'
+            f'{"view_counter.start_flushing()" if start else ""}\n'
+            'view_counter.record(1)\n'
+        )
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE='yatube.settings',
+                   YATUBE_ENV='test')
+        result = subprocess.run(
+            [sys.executable, '-c', script], cwd=settings.BASE_DIR, env=env,
+            capture_output=True, text=True, check=True)
+        return result.stdout.count('flush')
+
+    def test_exit_flush_only_in_serving_processes(self):
+        """Без start_flushing() просмотры при выходе не записываются."""
+        self.assertEqual(self.exit_flushes(start=False), 0)
+        self.assertEqual(self.exit_flushes(start=True), 1)
+
+    def test_failed_flush_is_logged(self):
+        view_counter.record(self.post.id)
+        broken = mock.patch.object(
+            Post.objects, 'filter', side_effect=DatabaseError)
+        with broken, self.assertLogs('posts.view_counter', 'ERROR'):
+            view_counter._flush_on_exit()
+        self.assertEqual(view_counter.pending(self.post.id), 1)
+        view_counter.flush()
+
+
+class PopularFeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_user')
+        cls.reader = User.objects.create_user(username='test_reader')
+        cls.quiet_post = Post.objects.create(
+            author=cls.author,
+            text='Пост без комментариев',
+        )
+        cls.hot_post = Post.objects.create(
+            author=cls.reader,
+            text='Обсуждаемый пост',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_comments_and_follows_raise_posts(self):
+        """Комментарии и подписки поднимают посты в популярной ленте."""
+        Comment.objects.create(
+            author=self.author, post=self.quiet_post, text='Комментарий')
+        for _ in range(2):
+            Comment.objects.create(
+                author=self.author, post=self.hot_post, text='Комментарий')
+        response = self.client.get(reverse('posts:popular'))
+        self.assertEqual(
+            list(response.context['page_obj']),
+            [self.hot_post, self.quiet_post]
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.client.get(reverse('posts:popular'))
+        self.assertEqual(response.context['page_obj'][0], self.quiet_post)
+
+    def test_scores_are_rebuilt_after_cache_loss(self):
+        """Без кеша топ восстанавливается по недавним комментариям."""
+        for post in (self.quiet_post, self.hot_post, self.hot_post):
+            Comment.objects.create(
+                author=self.author, post=post, text='Комментарий')
+        cache.clear()
+        self.assertEqual(
+            trending.top_ids(), [self.hot_post.id, self.quiet_post.id])
+
+    def test_concurrent_updates_are_not_lost(self):
+        """Одновременные обновления очков не теряются."""
+        # Первое обновление создаёт очки: потокам не нужна база
+        trending.comment_added(self.hot_post.id)
+        threads = [
+            threading.Thread(
+                target=trending.comment_added, args=(self.hot_post.id,))
+            for _ in range(20)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        scores = cache.get(trending.SCORES_KEY)['scores']
+        self.assertAlmostEqual(scores[self.hot_post.id], 21, places=2)
+
+    def test_popular_page_reads_only_page_posts(self):
+        """Страница популярного не пересчитывает рейтинг запросами."""
+        Comment.objects.create(
+            author=self.author, post=self.hot_post, text='Комментарий')
+        with self.assertNumQueries(1):
+            self.client.get(reverse('posts:popular'))
+
+
+class GroupDirectoryTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_user')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_group_index_stats_are_incremental(self):
+        """Каталог групп обновляет статистику без пересчёта."""
+        response = self.client.get(reverse('posts:group_index'))
+        self.assertEqual(response.context['groups'][0]['posts'], 0)
+        post = Post.objects.create(
+            author=self.author, group=self.group, text='Текст')
+        # Пост учитывается только после фиксации транзакции
+        response = self.client.get(reverse('posts:group_index'))
+        self.assertEqual(response.context['groups'][0]['posts'], 0)
+        group_stats.post_added(post)
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('posts:group_index'))
+        row = response.context['groups'][0]
+        self.assertEqual(row['posts'], 1)
+        self.assertEqual(row['last_activity'], post.pub_date)
+        self.assertEqual(row['top_authors'], [self.author.username])
+
+    def test_unsafe_slug_does_not_reach_cache_key(self):
+        """Произвольная строка из запроса не попадает в ключ кеша."""
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', CacheKeyWarning)
+            response = self.client.get(
+                reverse('posts:live_feed'),
+                {'feed': 'group', 'slug': 'пробел и\nперенос ' * 30})
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_group_lookup_is_cached_and_invalidated(self):
+        """Группа по slug берётся из кеша и сбрасывается при сохранении."""
+        url = reverse('posts:group_list', kwargs={'slug': 'test-slug'})
+        self.client.get(url)
+        # Остаётся только подсчёт постов группы
+        with self.assertNumQueries(1):
+            self.client.get(url)
+        self.group.title = 'Новый заголовок'
+        self.group.save()
+        response = self.client.get(url)
+        self.assertEqual(response.context['group'].title, 'Новый заголовок')
+
+
+@override_settings(RATELIMIT_ENABLED=False)
+class NotificationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_user')
+        cls.reader = User.objects.create_user(
+            username='test_reader', email='reader@example.com')
+        cls.other_reader = User.objects.create_user(username='test_other')
+        for user in (cls.reader, cls.other_reader):
+            Follow.objects.create(user=user, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def publish(self):
+        self.authorized_client.post(
+            reverse('posts:create_post'), {'text': 'Новый пост'})
+        return Post.objects.get(text='Новый пост')
+
+    def test_fan_out_runs_outside_request(self):
+        """Уведомления создаёт фоновая команда, а не запрос автора."""
+        post = self.publish()
+        self.assertFalse(Notification.objects.exists())
+        call_command('notify_followers', batch_size=1, stdout=StringIO())
+        self.assertEqual(
+            set(Notification.objects.values_list('user', 'post')),
+            {(self.reader.id, post.id), (self.other_reader.id, post.id)}
+        )
+        call_command('notify_followers', stdout=StringIO())
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_unread_count_is_cached(self):
+        """Счётчик в шапке не считается заново на каждой странице."""
+        self.publish()
+        notifications.fan_out()
+        self.reader_client.get(reverse('posts:index'))
+        with CaptureQueriesContext(connection) as context:
+            response = self.reader_client.get(reverse('posts:index'))
+        self.assertFalse([
+            query for query in context.captured_queries
+            if 'posts_notification' in query['sql']
+        ])
+        self.assertContains(response, 'Уведомления (1)')
+        response = self.reader_client.get(reverse('posts:notifications'))
+        self.assertEqual(len(response.context['page_obj']), 1)
+        self.assertFalse(response.context['page_obj'][0].is_read)
+        response = self.reader_client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'Уведомления (')
+
+    def test_only_shown_notifications_are_marked_read(self):
+        """Уведомления со второй страницы остаются непрочитанными."""
+        posts = [
+            Post.objects.create(author=self.author, text=f'Пост {i}')
+            for i in range(12)
+        ]
+        notifications.fan_out()
+        self.assertEqual(notifications.unread_count(self.reader), 12)
+        self.reader_client.get(reverse('posts:notifications'))
+        self.assertEqual(notifications.unread_count(self.reader), 2)
+        self.assertEqual(
+            set(Notification.objects.filter(
+                user=self.reader, is_read=False).values_list(
+                'post', flat=True)),
+            {posts[0].id, posts[1].id}
+        )
+
+    def test_digest_sent_once(self):
+        """Дайджест отправляется только подписчикам с почтой и один раз."""
+        self.publish()
+        notifications.fan_out()
+        self.assertEqual(notifications.send_digests(), 1)
+        self.assertEqual(mail.outbox[0].to, [self.reader.email])
+        self.assertIn('Новый пост', mail.outbox[0].body)
+        self.assertEqual(notifications.send_digests(), 0)
+
+
+@override_settings(LIVE_STREAM_TIMEOUT=0.3, LIVE_HEARTBEAT=0.1,
+                   LIVE_POLL_INTERVAL=0.02)
+class LiveFeedTest(TransactionTestCase):
+    # Таблицу постов опрашивает отдельный поток: данные должны быть
+    # зафиксированы, поэтому тесты идут без общей транзакции
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='test_user')
+        self.other = User.objects.create_user(username='test_other')
+        self.reader = User.objects.create_user(username='test_reader')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        self.last = Post.objects.create(author=self.author, text='Старый').id
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def publish(self, author, group=None):
+        # Пост из другого процесса: bulk_create не отправляет сигналов,
+        # и publish() этого процесса не вызывается
+        Post.objects.bulk_create(
+            [Post(author=author, group=group, text='Текст')])
+        return Post.objects.order_by('-id').first()
+
+    def publish_later(self, *args):
+        def publish():
+            self.publish(*args)
+            connection.close()
+
+        timer = threading.Timer(0.1, publish)
+        timer.start()
+        self.addCleanup(timer.join)
+
+    def stream(self, client, **params):
+        response = client.get(
+            reverse('posts:live_feed'), dict(params, last=self.last))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return b''.join(response.streaming_content).decode()
+
+    def events(self, client, **params):
+        return [
+            json.loads(line[len('data: '):])
+            for line in self.stream(client, **params).splitlines()
+            if line.startswith('data: ')
+        ]
+
+    def test_feeds_receive_only_their_posts(self):
+        """Каждая лента получает только свои новые посты."""
+        first = self.publish(self.author)
+        second = self.publish(self.other, self.group)
+        self.assertEqual(
+            self.events(self.client),
+            [{'count': 2, 'first_id': first.id, 'last_id': second.id}]
+        )
+        self.assertEqual(
+            self.events(self.client, feed='group', slug='test-slug'),
+            [{'count': 1, 'first_id': second.id, 'last_id': second.id}]
+        )
+        self.assertEqual(
+            self.events(self.reader_client, feed='follow'),
+            [{'count': 1, 'first_id': first.id, 'last_id': first.id}]
+        )
+
+    def test_posts_from_other_processes_arrive(self):
+        """Пост, созданный во время соединения, приходит с опросом."""
+        self.publish_later(self.other, self.group)
+        events = self.events(self.client, feed='group', slug='test-slug')
+        self.assertEqual([event['count'] for event in events], [1])
+
+    def test_clients_do_not_query_posts_while_waiting(self):
+        """Ждущий клиент разбирает события общего опроса, а не базу."""
+        self.assertTrue(live.acquire_stream(1))
+        self.addCleanup(live.release_stream)
+        subscription = live.Subscription(
+            'follow', self.last, user=self.reader)
+        self.publish_later(self.author)
+        with CaptureQueriesContext(connection) as context:
+            found = subscription.wait(5)
+        self.assertEqual(found['count'], 1)
+        self.assertEqual(context.captured_queries, [])
+
+    def test_follow_feed_requires_login(self):
+        response = self.client.get(
+            reverse('posts:live_feed'), {'feed': 'follow'})
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+    @override_settings(LIVE_MAX_STREAMS=0, LIVE_MAX_STREAMS_ASGI=1)
+    def test_streams_are_capped(self):
+        """Сверх предела клиент получает долгую паузу; под ASGI он выше."""
+        busy = f'retry: {settings.LIVE_BUSY_RETRY * 1000}\n\n'
+        self.assertEqual(self.stream(self.client), busy)
+        response = self.client.get(
+            reverse('posts:live_feed'), {'last': self.last},
+            **{'yatube.stream_pool': True})
+        self.assertNotEqual(
+            b''.join(response.streaming_content).decode(), busy)
+
+    def test_feed_page_offers_stream(self):
+        """Лента предлагает подписку с id последнего показанного поста."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, f'last={self.last}')
+        self.assertContains(response, 'Следить за новыми записями')
+
+
+@override_settings(LIVE_POLL_INTERVAL=10)
+class LiveWakeupTest(TransactionTestCase):
+    def test_waiting_client_wakes_on_publish(self):
+        """Пост этого процесса будит опрос сразу, не дожидаясь интервала."""
+        author = User.objects.create_user(username='test_user')
+        self.assertTrue(live.acquire_stream(1))
+        self.addCleanup(live.release_stream)
+        subscription = live.Subscription('all', 0)
+        published = []
+
+        def publish():
+            # Сигнал post_save вызывает live.publish() после фиксации
+            published.append(
+                Post.objects.create(author=author, text='Текст'))
+            connection.close()
+
+        timer = threading.Timer(0.05, publish)
+        timer.start()
+        started = time.monotonic()
+        found = subscription.wait(5)
+        timer.join()
+        self.assertEqual(found['last_id'], published[0].id)
+        self.assertLess(time.monotonic() - started, 1)
+
+
+class ArchiveTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_user')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.old_posts = [
+            Post.objects.create(
+                author=cls.user, group=cls.group, text=f'Старый пост {i}')
+            for i in range(3)
+        ]
+        cls.new_post = Post.objects.create(author=cls.user, text='Новый пост')
+        Post.objects.filter(id__in=[post.id for post in cls.old_posts]).update(
+            pub_date=timezone.now() - timedelta(days=400))
+        Comment.objects.create(
+            author=cls.user, post=cls.old_posts[0], text='Старый комментарий')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_command_moves_old_posts_in_batches(self):
+        """Старые посты и их комментарии переезжают в архив пачками."""
+        out = StringIO()
+        call_command('archive_posts', days=365, batch_size=2, stdout=out)
+        self.assertIn('3', out.getvalue())
+        self.assertEqual(list(Post.objects.all()), [self.new_post])
+        self.assertEqual(
+            set(ArchivedPost.objects.values_list('id', flat=True)),
+            {post.id for post in self.old_posts}
+        )
+        comment = ArchivedComment.objects.get()
+        self.assertEqual(comment.post_id, self.old_posts[0].id)
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(archive.archive(365), 0)
+
+    def test_archive_resumes_after_partial_copy(self):
+        """Повторный запуск дописывает архив без дублей."""
+        post = self.old_posts[0]
+        ArchivedPost.objects.create(
+            id=post.id, text=post.text, pub_date=post.pub_date,
+            author=self.user)
+        self.assertEqual(archive.archive(365), 3)
+        self.assertEqual(ArchivedPost.objects.count(), 3)
+
+    def test_post_detail_falls_back_to_archive(self):
+        """Архивный пост открывается по прежнему адресу, только для чтения."""
+        post = self.old_posts[0]
+        archive.archive(365)
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.id}))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response.context['archived'])
+        self.assertEqual(response.context['post'].text, post.text)
+        self.assertContains(response, 'Старый комментарий')
+        self.assertNotContains(
+            response, reverse('posts:add_comment', args=[post.id]))
+        self.assertNotContains(
+            response, reverse('posts:update_post', args=[post.id]))
+        missing = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': 10 ** 6}))
+        self.assertEqual(missing.status_code, HTTPStatus.NOT_FOUND)
+
+
+class SoftDeleteTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_user')
+        cls.reader = User.objects.create_user(username='test_reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(author=self.author, text='Текст')
+        self.comments = [
+            Comment.objects.create(
+                author=self.reader, post=self.post, text=f'Комментарий {i}')
+            for i in range(5)
+        ]
+        notifications.fan_out()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_deleted_post_is_hidden(self):
+        """Помеченный пост пропадает со страниц и из кешей сразу."""
+        trending.comment_added(self.post.id)
+        self.assertEqual(notifications.unread_count(self.reader), 1)
+        deletion.delete_posts([self.post.id])
+        response = self.reader_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        response = self.reader_client.get(reverse('posts:notifications'))
+        self.assertEqual(len(response.context['page_obj']), 0)
+        self.assertEqual(trending.top_ids(), [])
+        self.assertEqual(Comment.all_objects.count(), 5)
+        self.assertEqual(notifications.unread_count(self.reader), 0)
+
+    def test_deleted_comment_is_hidden(self):
+        deletion.delete_comments([self.comments[0].id])
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}))
+        self.assertNotContains(response, 'Комментарий 0')
+        self.assertContains(response, 'Комментарий 1')
+
+    def test_purge_removes_rows_in_batches(self):
+        """Команда удаляет зависимые строки пачками и сбрасывает счётчики."""
+        self.assertEqual(notifications.unread_count(self.reader), 1)
+        deletion.delete_comments([self.comments[0].id])
+        deletion.delete_posts([self.post.id])
+        with CaptureQueriesContext(connection) as context:
+            call_command('purge_deleted', batch_size=2, stdout=StringIO())
+        deletes = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith(
+                'DELETE FROM "posts_comment" WHERE "posts_comment"."id" IN')
+        ]
+        self.assertEqual(len(deletes), 3)
+        self.assertFalse(Post.all_objects.exists())
+        self.assertFalse(Comment.all_objects.exists())
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(notifications.unread_count(self.reader), 0)
+        self.assertEqual(deletion.purge(), 0)
+
+
+class FollowFeedCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_user')
+        cls.other = User.objects.create_user(username='test_other')
+        cls.reader = User.objects.create_user(username='test_reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.posts = [
+            Post.objects.create(author=self.author, text=f'Пост {i}')
+            for i in range(12)
+        ]
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def feed(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.reader_client.get(reverse('posts:follow_index'))
+        post_queries = [
+            query for query in context.captured_queries
+            if 'posts_post' in query['sql']
+        ]
+        return response.context['page_obj'], post_queries
+
+    def test_repeat_visit_reads_cache(self):
+        """Повторный показ первой страницы не обращается к постам."""
+        first, _ = self.feed()
+        page_obj, post_queries = self.feed()
+        self.assertEqual(post_queries, [])
+        self.assertEqual(list(page_obj), list(first))
+        self.assertEqual(page_obj.paginator.num_pages, 2)
+
+    def test_new_post_appears_after_commit(self):
+        """Новый пост попадает в ленту сразу после фиксации транзакции."""
+        self.feed()
+        with mock.patch.object(transaction, 'on_commit',
+                               lambda callback: callback()):
+            post = Post.objects.create(author=self.author, text='Свежий пост')
+        page_obj, _ = self.feed()
+        self.assertEqual(page_obj[0].id, post.id)
+        self.assertEqual(len(page_obj), 10)
+        self.assertEqual(page_obj.paginator.count, 13)
+        _, post_queries = self.feed()
+        self.assertEqual(post_queries, [])
+
+    def test_evicted_token_is_a_miss(self):
+        """Страница не совпадает с меткой, пропавшей из кеша."""
+        self.feed()
+        Post.objects.filter(pk=self.posts[-1].pk).update(excerpt='Правка')
+        cache.delete(feed_cache.USER_TOKEN_KEY.format(self.reader.id))
+        page_obj, post_queries = self.feed()
+        self.assertTrue(post_queries)
+        self.assertEqual(page_obj[0].excerpt, 'Правка')
+
+    def test_edit_resets_cache(self):
+        self.feed()
+        Post.objects.filter(pk=self.posts[-1].pk).update(excerpt='Правка')
+        feed_cache.posts_changed()
+        page_obj, post_queries = self.feed()
+        self.assertTrue(post_queries)
+        self.assertEqual(page_obj[0].excerpt, 'Правка')
+
+    def test_follow_and_unfollow_reset_cache(self):
+        self.feed()
+        Post.objects.create(author=self.other, text='Пост другого автора')
+        self.reader_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': 'test_other'}))
+        page_obj, _ = self.feed()
+        self.assertEqual(page_obj[0].text, 'Пост другого автора')
+        self.reader_client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': 'test_other'}))
+        page_obj, _ = self.feed()
+        self.assertEqual(page_obj.paginator.count, 12)
+
+    def test_deleted_post_leaves_cache(self):
+        self.feed()
+        deletion.delete_posts([self.posts[-1].id])
+        page_obj, _ = self.feed()
+        self.assertNotIn(self.posts[-1].id, [post.id for post in page_obj])
+        self.assertEqual(page_obj.paginator.count, 11)
+
+
+class WarmCacheTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='test_user')
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for i in range(12):
+            Post.objects.create(
+                author=self.author, group=self.group, text=f'Пост {i}')
+
+    def test_command_fills_cache(self):
+        """Команда заполняет кеш лент и не засчитывает просмотры."""
+        out = StringIO()
+        call_command('warm_cache', pages=2, threads=2, stdout=out)
+        self.assertIn('Прогрето страниц и миниатюр: 6', out.getvalue())
+        for page in (1, 2):
+            self.assertIsNotNone(cache.get(
+                make_template_fragment_key('index_page', [page])))
+        self.assertIsNotNone(cache.get(
+            group_stats._group_key(self.group.slug)))
+        self.assertEqual(view_counter.pending(Post.objects.first().id), 0)
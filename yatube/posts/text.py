@@ -0,0 +1,109 @@
+import re
+from html import unescape
+
+from django.utils.html import escape, strip_tags
+
+# Длина превью поста в ленте, символов
+EXCERPT_LENGTH = 300
+
+SPACES = re.compile(r'\s+')
+BLOCK_END = re.compile(r'</p>|</li>|<br>')
+
+
+def make_excerpt(text, length=EXCERPT_LENGTH):
+    """Короткий текст для карточки в ленте и признак, что он обрезан."""
+    plain = SPACES.sub(' ', text).strip()
+    return _truncate(plain, length)
+
+
+def make_excerpt_from_html(html, length=EXCERPT_LENGTH):
+    """То же для уже отрисованного HTML: разметка в превью не попадает."""
+    text = unescape(strip_tags(BLOCK_END.sub(' ', html)))
+    plain = SPACES.sub(' ', text).strip()
+    return _truncate(plain, length)
+
+
+def _truncate(plain, length):
+    if len(plain) <= length:
+        return plain, False
+    cut = plain[:length].rsplit(' ', 1)[0] or plain[:length]
+    return cut.rstrip(' .,;:!?-') + '…', True
+
+
+# Увеличивается при любом изменении разметки, которую выдаёт
+# render_markdown: сохранённый HTML старой версии будет перерисован
+RENDER_VERSION = 1
+
+LIST_ITEM = re.compile(r'^\s*[-*]\s+')
+CODE = re.compile(r'(`[^`]+`)')
+LINK = re.compile(r'\[([^\]]+)\]\((https?://[^\s)]+)\)')
+STRONG = re.compile(r'\*\*(.+?)\*\*')
+EM = re.compile(r'\*(.+?)\*')
+
+
+def _inline(line):
+    parts = []
+    for part in CODE.split(line):
+        if part.startswith('`') and part.endswith('`') and len(part) > 1:
+            parts.append(f'<code>{escape(part[1:-1])}</code>')
+            continue
+        part = escape(part)
+        part = LINK.sub(
+            r'<a href="\2" rel="nofollow noopener">\1</a>', part)
+        part = STRONG.sub(r'<strong>\1</strong>', part)
+        part = EM.sub(r'<em>\1</em>', part)
+        parts.append(part)
+    return ''.join(parts)
+
+
+def render_markdown(text):
+    """HTML для подмножества Markdown: абзацы, списки, **жирный**,
+    *курсив*, `код` и ссылки http(s).
+
+    Весь исходный текст экранируется до разметки, поэтому сырой HTML
+    из поста в страницу не попадает.
+    """
+    text = text.replace('\r\n', '\n').strip()
+    if not text:
+        return ''
+    html = []
+    for block in re.split(r'\n\s*\n', text):
+        lines = block.split('\n')
+        if all(LIST_ITEM.match(line) for line in lines):
+            items = ''.join(
+                f'<li>{_inline(LIST_ITEM.sub("", line))}</li>'
+                for line in lines
+            )
+            html.append(f'<ul>{items}</ul>')
+        else:
+            html.append(
+                '<p>' + '<br>'.join(_inline(line) for line in lines) + '</p>')
+    return '\n'.join(html)
+
+
+def rerender(model, with_excerpt=False, batch_size=500):
+    """Перерисовывает HTML устаревшей версии пачками.
+
+    Принимает и модели из миграций, у которых нет методов RenderedText.
+    Возвращает число обновлённых записей.
+    """
+    fields = ['text_html', 'render_version']
+    if with_excerpt:
+        fields += ['excerpt', 'has_more']
+    stale = model.objects.exclude(
+        render_version=RENDER_VERSION).only('id', 'text').order_by('id')
+    updated = 0
+    last_id = 0
+    while True:
+        batch = list(stale.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            return updated
+        for obj in batch:
+            obj.text_html = render_markdown(obj.text)
+            obj.render_version = RENDER_VERSION
+            if with_excerpt:
+                obj.excerpt, obj.has_more = make_excerpt_from_html(
+                    obj.text_html)
+        model.objects.bulk_update(batch, fields)
+        updated += len(batch)
+        last_id = batch[-1].id
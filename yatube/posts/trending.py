@@ -0,0 +1,121 @@
+import math
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from core import cache as coalesced_cache
+
+from .models import Comment, Post
+
+
+SCORES_KEY = 'trending:scores'
+TOP_KEY = 'trending:top'
+# Сколько кандидатов хранить сверх размера топа
+CANDIDATES_FACTOR = 10
+# Порог, после которого веса пересчитываются к новой точке отсчёта
+MAX_EXPONENT = 500
+# За сколько периодов полураспада учитывать комментарии при восстановлении
+# очков: более старые весят меньше 1/16 и на порядок не влияют
+REBUILD_HALF_LIVES = 4
+
+
+def _weight(amount, now, epoch):
+    """Вес события, приведённый к точке отсчёта epoch.
+
+    Вместо того чтобы уменьшать все очки со временем, новые события
+    получают экспоненциально больший вес: порядок постов при этом тот же,
+    а обновление затрагивает только один пост.
+    """
+    exponent = (now - epoch) / settings.TRENDING_HALF_LIFE
+    return amount * math.pow(2, exponent)
+
+
+def _rebuild(now):
+    """Очки по недавним комментариям, если их нет в кеше.
+
+    Подписки время не хранят, поэтому после потери кеша их вклад
+    набирается заново.
+    """
+    since = timezone.now() - timedelta(
+        seconds=settings.TRENDING_HALF_LIFE * REBUILD_HALF_LIVES)
+    scores = {}
+    for post_id, created in Comment.objects.filter(
+            created__gte=since, post__deleted_at__isnull=True
+    ).values_list('post_id', 'created').iterator():
+        scores[post_id] = scores.get(post_id, 0) + _weight(
+            settings.TRENDING_COMMENT_WEIGHT, created.timestamp(), now)
+    return {'epoch': now, 'scores': scores}
+
+
+def _load(now):
+    return cache.get(SCORES_KEY) or _rebuild(now)
+
+
+def _store(state):
+    scores = state['scores']
+    top = sorted(scores, key=scores.get, reverse=True)
+    limit = settings.TRENDING_SIZE * CANDIDATES_FACTOR
+    for stale in top[limit:]:
+        del scores[stale]
+    cache.set(SCORES_KEY, state, None)
+    cache.set(TOP_KEY, top[:settings.TRENDING_SIZE], None)
+    return top
+
+
+def _add(post_id, amount):
+    now = time.time()
+    # Очки меняют все процессы: чтение и запись идут под общей блокировкой
+    with coalesced_cache.mutex(SCORES_KEY):
+        state = _load(now)
+        exponent = (now - state['epoch']) / settings.TRENDING_HALF_LIFE
+        if exponent > MAX_EXPONENT:
+            factor = math.pow(2, -exponent)
+            state['scores'] = {
+                key: value * factor
+                for key, value in state['scores'].items()
+            }
+            state['epoch'] = now
+        scores = state['scores']
+        scores[post_id] = (
+            scores.get(post_id, 0) + _weight(amount, now, state['epoch'])
+        )
+        _store(state)
+
+
+def comment_added(post_id):
+    _add(post_id, settings.TRENDING_COMMENT_WEIGHT)
+
+
+def follower_added(author_id):
+    """Новый подписчик поднимает последний пост автора."""
+    post_id = Post.objects.filter(
+        author_id=author_id
+    ).values_list('id', flat=True).first()
+    if post_id is not None:
+        _add(post_id, settings.TRENDING_FOLLOW_WEIGHT)
+
+
+def forget(post_ids):
+    """Убирает удалённые посты из очков и топа."""
+    with coalesced_cache.mutex(SCORES_KEY):
+        state = _load(time.time())
+        for post_id in post_ids:
+            state['scores'].pop(post_id, None)
+        _store(state)
+
+
+def top_ids():
+    top = cache.get(TOP_KEY)
+    if top is None:
+        with coalesced_cache.mutex(SCORES_KEY):
+            top = _store(_load(time.time()))[:settings.TRENDING_SIZE]
+    return top
+
+
+def posts_for(ids):
+    """Посты в порядке ids; удалённые пропускаются."""
+    posts = Post.objects.for_feed().in_bulk(ids)
+    return [posts[post_id] for post_id in ids if post_id in posts]
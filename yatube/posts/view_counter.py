@@ -0,0 +1,102 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+
+from .models import Post
+
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_pending = Counter()
+_last_flush = time.monotonic()
+_flusher = None
+
+
+def record(post_id):
+    """Учитывает просмотр поста в памяти процесса."""
+    with _lock:
+        _pending[post_id] += 1
+        due = (
+            time.monotonic() - _last_flush
+            >= settings.POST_VIEWS_FLUSH_INTERVAL
+        )
+    if due:
+        flush()
+
+
+def pending(post_id):
+    with _lock:
+        return _pending[post_id]
+
+
+def flush():
+    """Записывает накопленные просмотры в базу.
+
+    Посты с одинаковым приростом обновляются одним UPDATE, поэтому число
+    запросов не зависит от количества просмотренных постов.
+    """
+    global _last_flush
+    with _lock:
+        counts = dict(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+    if not counts:
+        return 0
+    by_increment = defaultdict(list)
+    for post_id, increment in counts.items():
+        by_increment[increment].append(post_id)
+    try:
+        with transaction.atomic():
+            for increment, post_ids in by_increment.items():
+                Post.objects.filter(pk__in=post_ids).update(
+                    views=F('views') + increment)
+    except Exception:
+        # Возвращаем просмотры в очередь, чтобы не потерять их
+        with _lock:
+            _pending.update(counts)
+        raise
+    return sum(counts.values())
+
+
+def _flush_periodically():
+    while True:
+        time.sleep(settings.POST_VIEWS_FLUSH_INTERVAL)
+        try:
+            flush()
+        except Exception:
+            logger.exception('Не удалось записать просмотры постов')
+        finally:
+            connection.close()
+
+
+def _flush_on_exit():
+    try:
+        flush()
+    except Exception:
+        logger.exception(
+            'Не удалось записать просмотры постов при остановке')
+
+
+def start_flushing():
+    """Записывает просмотры раз в POST_VIEWS_FLUSH_INTERVAL и при выходе.
+
+    Без этого просмотры копятся, пока не придёт следующий запрос.
+    Вызывается из точек входа WSGI и ASGI. В остальных процессах
+    (manage.py, тесты) запись при выходе не регистрируется: к этому
+    моменту соединение может смотреть уже не в ту базу.
+    """
+    global _flusher
+    with _lock:
+        if _flusher is not None:
+            return
+        _flusher = threading.Thread(
+            target=_flush_periodically, name='view-counter', daemon=True)
+    _flusher.start()
+    atexit.register(_flush_on_exit)
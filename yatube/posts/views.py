@@ -1,8 +1,18 @@
+import json
+import time
+
+from django.conf import settings
 from django.core.paginator import Paginator
+from django.http import (Http404, HttpResponseForbidden,
+                         StreamingHttpResponse)
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 
-from .models import Post, Group, User, Follow
+from core.ratelimit import ratelimit
+
+from . import (archive, comment_queue, feed_cache, group_stats, live,
+               notifications, trending, view_counter)
+from .models import Notification, Post, User, Follow
 from .forms import PostForm, CommentForm
 
 
@@ -10,7 +20,7 @@ POSTS_ON_PAGE = 10
 
 
 def index(request):
-    posts = Post.objects.select_related('author').all()
+    posts = Post.objects.for_feed()
     text = 'Последние обновления на сайте'
     paginator = Paginator(posts, POSTS_ON_PAGE)
     page_number = request.GET.get('page')
@@ -23,9 +33,29 @@ def index(request):
     return render(request, 'posts/index.html', context)
 
 
+def popular(request):
+    paginator = Paginator(trending.top_ids(), POSTS_ON_PAGE)
+    page_number = request.GET.get('page')
+    page_obj = paginator.get_page(page_number)
+    page_obj.object_list = trending.posts_for(page_obj.object_list)
+    context = {
+        'title': 'Популярные записи',
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/popular.html', context)
+
+
+def group_index(request):
+    context = {
+        'title': 'Группы',
+        'groups': group_stats.directory(),
+    }
+    return render(request, 'posts/group_index.html', context)
+
+
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = Post.objects.filter(group=group)
+    group = group_stats.get_group(slug)
+    posts = Post.objects.filter(group=group).for_feed()
     paginator = Paginator(posts, POSTS_ON_PAGE)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
@@ -40,12 +70,11 @@ def group_posts(request, slug):
 
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    posts = Post.objects.filter(
-        author=author).select_related('author', 'group')
-    count_posts = posts.count()
+    posts = Post.objects.filter(author=author).for_feed()
     paginator = Paginator(posts, POSTS_ON_PAGE)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    count_posts = paginator.count
     if request.user.is_authenticated:
         following = Follow.objects.filter(
             user=request.user.id,
@@ -64,22 +93,48 @@ def profile(request, username):
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = Post.objects.select_related(
+        'author', 'group').filter(pk=post_id).first()
+    if post is None:
+        return archived_post_detail(request, post_id)
+    view_counter.record(post.id)
+    post.views += view_counter.pending(post.id)
     author_posts = Post.objects.filter(author=post.author).count()
     group_name = post.group
     form = CommentForm()
-    comments = post.comments.filter(post=post_id)
+    comments = post.comments.select_related('author')
+    pending_comments = []
+    if request.user.is_authenticated:
+        pending_comments = comment_queue.pending_for_post(
+            request.session, post.id, comments, request.user)
     context = {
         'title': group_name,
         'post': post,
         'author_posts': author_posts,
         'comments': comments,
+        'pending_comments': pending_comments,
         'form': form,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def archived_post_detail(request, post_id):
+    """Пост, перенесённый в архив: только чтение, без счётчика просмотров."""
+    post = archive.get_archived_post(post_id)
+    if post is None:
+        raise Http404
+    context = {
+        'title': post.group,
+        'post': post,
+        'author_posts': Post.objects.filter(author=post.author).count(),
+        'comments': post.comments.select_related('author'),
+        'archived': True,
+    }
+    return render(request, 'posts/post_detail.html', context)
+
+
 @login_required
+@ratelimit('post_create', methods=('POST',))
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
@@ -108,10 +163,16 @@ def post_edit(request, post_id):
 
 
 @login_required
+@ratelimit('add_comment', methods=('POST',))
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(Post.objects.only('id'), id=post_id)
     form = CommentForm(request.POST or None)
-    if form.is_valid():
+    if form.is_valid() and settings.COMMENTS_BUFFERED:
+        # Запись в базу откладывается до команды drain_comments
+        entry = comment_queue.enqueue(
+            post.id, request.user.id, form.cleaned_data['text'])
+        comment_queue.remember_pending(request.session, entry)
+    elif form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
@@ -121,10 +182,18 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    post = Post.objects.filter(author__following__user=request.user)
+    post = Post.objects.filter(
+        author__following__user=request.user).for_feed()
     paginator = Paginator(post, POSTS_ON_PAGE)
     page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    if page_number in (None, '1'):
+        # Первая страница целиком берётся из кеша, без запросов к базе
+        entry = feed_cache.first_page(request.user.id, POSTS_ON_PAGE)
+        paginator.count = entry['count']
+        page_obj = paginator.page(1)
+        page_obj.object_list = entry['posts']
+    else:
+        page_obj = paginator.get_page(page_number)
     content = {
         'page_obj': page_obj,
     }
@@ -132,6 +201,28 @@ def follow_index(request):
 
 
 @login_required
+def notification_list(request):
+    items = Notification.objects.filter(
+        user=request.user, post__deleted_at__isnull=True).select_related(
+        'post__author').only(
+        'created', 'is_read', 'post__id', 'post__excerpt',
+        'post__author__username', 'post__author__first_name',
+        'post__author__last_name')
+    paginator = Paginator(items, POSTS_ON_PAGE)
+    page_number = request.GET.get('page')
+    page_obj = paginator.get_page(page_number)
+    # Страница читается до отметки, чтобы новые уведомления выделялись
+    page_obj.object_list = list(page_obj.object_list)
+    notifications.mark_read(
+        request.user, [item.id for item in page_obj.object_list])
+    context = {
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/notifications.html', context)
+
+
+@login_required
+@ratelimit('profile_follow')
 def profile_follow(request, username):
     author_obj = get_object_or_404(User, username=username)
     user_obj = request.user
@@ -150,4 +241,70 @@ def profile_unfollow(request, username):
         user=user_obj,
         author=author_obj
     ).delete()
+    # Сигнал post_delete отключил бы быстрое удаление, поэтому кеш
+    # ленты сбрасывается здесь
+    feed_cache.forget([user_obj.id])
     return redirect('posts:profile', username=author_obj.username)
+
+
+def _live_events(request, feed, after):
+    limit = settings.LIVE_MAX_STREAMS
+    if request.META.get('yatube.stream_pool'):
+        limit = settings.LIVE_MAX_STREAMS_ASGI
+    if not live.acquire_stream(limit):
+        # Все места заняты: клиент попробует снова гораздо позже
+        yield f'retry: {settings.LIVE_BUSY_RETRY * 1000}\n\n'
+        return
+    try:
+        group = None
+        if feed == 'group':
+            group = group_stats.get_group(request.GET.get('slug', ''))
+        subscription = live.Subscription(
+            feed, after, group=group, user=request.user)
+        yield f'retry: {settings.LIVE_RETRY * 1000}\n\n'
+        deadline = time.monotonic() + settings.LIVE_STREAM_TIMEOUT
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            found = subscription.wait(
+                min(remaining, settings.LIVE_HEARTBEAT))
+            if found:
+                yield (f'id: {found["last_id"]}\nevent: posts\n'
+                       f'data: {json.dumps(found)}\n\n')
+            else:
+                # Комментарий держит соединение открытым через прокси
+                yield ': ping\n\n'
+    finally:
+        live.release_stream()
+
+
+def live_feed(request):
+    """Поток Server-Sent Events о новых постах ленты.
+
+    Лента подключается к потоку только по просьбе читателя. Таблицу
+    постов опрашивает один поток на процесс, клиенты только разбирают
+    его события. Каждое соединение держит поток, поэтому их число
+    ограничено: LIVE_MAX_STREAMS под WSGI, где это потоки воркера, и
+    LIVE_MAX_STREAMS_ASGI под ASGI, где это отдельный пул потоковых
+    ответов. Клиент получает только число новых постов и диапазон их
+    id. Через LIVE_STREAM_TIMEOUT секунд поток закрывается, и
+    EventSource переподключается с заголовком Last-Event-ID.
+    """
+    feed = request.GET.get('feed', 'all')
+    if feed == 'follow' and not request.user.is_authenticated:
+        return HttpResponseForbidden()
+    if feed == 'group':
+        # Неизвестная группа — 404 до начала потока
+        group_stats.get_group(request.GET.get('slug', ''))
+    after = request.META.get('HTTP_LAST_EVENT_ID') or request.GET.get('last')
+    try:
+        after = int(after)
+    except (TypeError, ValueError):
+        after = 0
+    response = StreamingHttpResponse(
+        _live_events(request, feed, after),
+        content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,99 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections
+from django.db.models import Count
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+from sorl.thumbnail import get_thumbnail
+
+from . import group_stats
+from .models import Group, Post
+
+
+def _host():
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*':
+            return host.lstrip('.')
+    return 'localhost'
+
+
+def feed_urls(pages):
+    """Первые страницы главной, крупнейших групп и активных авторов."""
+    stats = group_stats.get_stats()
+    groups = sorted(stats, key=lambda group_id: stats[group_id]['posts'],
+                    reverse=True)[:settings.CACHE_WARM_GROUPS]
+    slugs = dict(Group.objects.filter(id__in=groups).values_list(
+        'id', 'slug'))
+    authors = Post.objects.values('author__username').annotate(
+        posts=Count('id')).order_by('-posts')[:settings.CACHE_WARM_PROFILES]
+    urls = [reverse('posts:index')]
+    urls += [reverse('posts:group_list', args=[slugs[group_id]])
+             for group_id in groups if group_id in slugs]
+    urls += [reverse('posts:profile', args=[author['author__username']])
+             for author in authors]
+    return [
+        f'{url}?page={page}' if page > 1 else url
+        for url in urls for page in range(1, pages + 1)
+    ]
+
+
+def _fetch(url):
+    """Вызывает view напрямую, как для анонимного посетителя.
+
+    Тестовый Client не подходит: на время запроса он отключает
+    close_old_connections от request_started во всём процессе.
+    """
+    request = RequestFactory(HTTP_HOST=_host()).get(url)
+    request.user = AnonymousUser()
+    match = resolve(request.path_info)
+    try:
+        return match.func(request, *match.args, **match.kwargs).status_code
+    finally:
+        connections.close_all()
+
+
+def _prepare_thumbnail(post_id):
+    """Миниатюра поста без вызова post_detail.
+
+    Сам view не вызывается, чтобы прогрев не считался просмотром.
+    """
+    try:
+        post = Post.objects.only('image').get(pk=post_id)
+        get_thumbnail(post.image, '960x339', crop='center', upscale=True)
+    finally:
+        connections.close_all()
+
+
+def warm(pages=None, posts=None, threads=None):
+    """Заполняет кеш страницами, которые первыми откроют после запуска.
+
+    Страницы запрашиваются у view в пуле потоков, так что заполняются
+    кеш фрагментов, групп, статистики и миниатюр. Возвращает число
+    прогретых страниц и миниатюр.
+    """
+    pages = pages or settings.CACHE_WARM_PAGES
+    posts = settings.CACHE_WARM_POSTS if posts is None else posts
+    post_ids = list(Post.objects.exclude(image='').order_by(
+        '-views').values_list('id', flat=True)[:posts])
+    urls = feed_urls(pages)
+    with ThreadPoolExecutor(
+            max_workers=threads or settings.CACHE_WARM_THREADS,
+            thread_name_prefix='warm-cache') as executor:
+        list(executor.map(_fetch, urls))
+        list(executor.map(_prepare_thumbnail, post_ids))
+    return len(urls) + len(post_ids)
+
+
+def warm_on_start():
+    """Фоновый прогрев при CACHE_WARM_ON_START.
+
+    Вызывается из точек входа WSGI и ASGI, а не из ready(): команды
+    manage.py (migrate и другие) кеш не прогревают. Процесс начинает
+    принимать запросы сразу.
+    """
+    if settings.CACHE_WARM_ON_START:
+        threading.Thread(
+            target=warm, name='warm-cache', daemon=True).start()
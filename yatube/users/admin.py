@@ -0,0 +1,41 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+
+from . import deletion
+from .models import AccountDeletion
+
+
+User = get_user_model()
+
+
+class AccountAdmin(UserAdmin):
+    """Удаление пользователя из админки ставит его в очередь.
+
+    Каскад по постам, комментариям и подпискам не собирается ни для
+    страницы подтверждения, ни для самого удаления: записи пачками
+    удалит команда delete_accounts.
+    """
+
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        model_count = {self.model._meta.verbose_name_plural: len(objs)}
+        return [str(obj) for obj in objs], model_count, set(), []
+
+    def delete_model(self, request, obj):
+        deletion.request_deletion(obj)
+
+    def delete_queryset(self, request, queryset):
+        for user in queryset:
+            deletion.request_deletion(user)
+
+
+class AccountDeletionAdmin(admin.ModelAdmin):
+    list_display = ('user', 'requested', 'removed')
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
+
+
+admin.site.unregister(User)
+admin.site.register(User, AccountAdmin)
+admin.site.register(AccountDeletion, AccountDeletionAdmin)
@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.db.models import F, Q
+
+from posts import deletion as posts_deletion
+from posts.deletion import delete_in_batches
+from posts.models import (ArchivedComment, ArchivedPost, Comment, Follow,
+                          Notification, Post)
+
+from .models import AccountDeletion
+
+
+def request_deletion(user):
+    """Отключает аккаунт сразу; записи удалит команда delete_accounts."""
+    user.is_active = False
+    user.save(update_fields=['is_active'])
+    AccountDeletion.objects.get_or_create(user=user)
+
+
+def _posts(user, batch_size):
+    removed = 0
+    while True:
+        post_ids = list(Post.all_objects.filter(author=user).order_by(
+            'id').values_list('id', flat=True)[:batch_size])
+        if not post_ids:
+            return removed
+        # Пачка сначала пропадает из лент и кешей, потом удаляется
+        posts_deletion.delete_posts(post_ids)
+        for post_id in post_ids:
+            removed += posts_deletion.purge_post(post_id, batch_size)
+
+
+def _rows(queryset):
+    def step(user, batch_size):
+        return delete_in_batches(queryset(user), batch_size)
+    return step
+
+
+# Шаги в порядке важности: публичные записи пропадают первыми
+STEPS = (
+    ('посты', _posts),
+    ('комментарии', _rows(
+        lambda user: Comment.all_objects.filter(author=user))),
+    ('подписки', _rows(
+        lambda user: Follow.objects.filter(Q(user=user) | Q(author=user)))),
+    ('уведомления', _rows(
+        lambda user: Notification.objects.filter(user=user))),
+    ('архивные комментарии', _rows(
+        lambda user: ArchivedComment.objects.filter(
+            Q(author=user) | Q(post__author=user)))),
+    ('архивные посты', _rows(
+        lambda user: ArchivedPost.objects.filter(author=user))),
+)
+
+
+def delete_account(account_deletion, batch_size=None, report=None):
+    """Удаляет записи пользователя пачками, а затем его самого.
+
+    Каждая пачка — отдельная короткая транзакция, поэтому прерванное
+    удаление продолжается повторным запуском. report(user, step, count)
+    вызывается после каждого шага, где что-то удалено.
+    """
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    user = account_deletion.user
+    for name, step in STEPS:
+        removed = step(user, batch_size)
+        if not removed:
+            continue
+        AccountDeletion.objects.filter(pk=account_deletion.pk).update(
+            removed=F('removed') + removed)
+        if report is not None:
+            report(user, name, removed)
+    # Зависимых строк не осталось: каскад ничего не соберёт
+    user.delete()
+
+
+def run(batch_size=None, report=None):
+    """Обрабатывает все заявки; возвращает число удалённых аккаунтов."""
+    deletions = list(AccountDeletion.objects.select_related('user'))
+    for account_deletion in deletions:
+        delete_account(account_deletion, batch_size, report)
+    return len(deletions)
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users import deletion
+
+
+class Command(BaseCommand):
+    help = 'Удаляет аккаунты, для которых запрошено удаление, пачками'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Сколько строк удалять за один запрос',
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, проверяя новые заявки',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=60.0,
+            help='Пауза между проверками в секундах',
+        )
+
+    def report(self, user, step, count):
+        self.stdout.write(f'{user}: {step} — удалено {count}')
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = deletion.run(options['batch_size'], self.report)
+            if deleted:
+                self.stdout.write(f'Удалено аккаунтов: {deleted}')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
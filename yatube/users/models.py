@@ -12,3 +12,27 @@ class Contact(models.Model):
     subject = models.CharField(max_length=100)
     body = models.TextField()
     is_answered = models.BooleanField(default=False)
+
+
+class AccountDeletion(models.Model):
+    """Заявка на удаление аккаунта.
+
+    Пользователь отключается сразу, а его записи пачками удаляет команда
+    delete_accounts; заявка исчезает вместе с пользователем.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='deletion',
+        verbose_name='Пользователь',
+    )
+    requested = models.DateTimeField('Запрошено', auto_now_add=True)
+    removed = models.PositiveIntegerField('Удалено строк', default=0)
+
+    class Meta:
+        ordering = ['requested']
+        verbose_name = 'Удаление аккаунта'
+        verbose_name_plural = 'Удаления аккаунтов'
+
+    def __str__(self):
+        return str(self.user)
@@ -0,0 +1,95 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import notifications
+from posts.models import ArchivedPost, Comment, Follow, Notification, Post
+
+from . import deletion
+from .models import AccountDeletion
+
+
+User = get_user_model()
+
+
+class AccountDeletionTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.other = User.objects.create_user(username='other')
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='leaving')
+        Follow.objects.create(user=self.user, author=self.other)
+        Follow.objects.create(user=self.other, author=self.user)
+        self.posts = [
+            Post.objects.create(author=self.user, text=f'Пост {i}')
+            for i in range(3)
+        ]
+        Comment.objects.create(
+            author=self.other, post=self.posts[0], text='Чужой комментарий')
+        self.other_post = Post.objects.create(author=self.other, text='Пост')
+        Comment.objects.create(
+            author=self.user, post=self.other_post, text='Свой комментарий')
+        notifications.fan_out()
+        ArchivedPost.objects.create(
+            id=10 ** 6, text='Архив', pub_date=self.posts[0].pub_date,
+            author=self.user)
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_request_deactivates_immediately(self):
+        """После запроса пользователь сразу выходит и не может войти."""
+        response = self.client.get(reverse('users:delete_account'))
+        self.assertTemplateUsed(response, 'users/delete_account.html')
+        response = self.client.post(reverse('users:delete_account'))
+        self.assertRedirects(response, reverse('posts:index'))
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertTrue(AccountDeletion.objects.filter(
+            user=self.user).exists())
+        self.assertFalse(self.client.login(username='leaving', password=''))
+        self.assertEqual(Post.objects.filter(author=self.user).count(), 3)
+
+    def test_command_removes_content_in_batches(self):
+        """Команда удаляет записи пачками и сообщает о ходе работы."""
+        deletion.request_deletion(self.user)
+        out = StringIO()
+        call_command('delete_accounts', batch_size=2, stdout=out)
+        self.assertIn('leaving: посты', out.getvalue())
+        self.assertIn('Удалено аккаунтов: 1', out.getvalue())
+        self.assertFalse(User.objects.filter(username='leaving').exists())
+        self.assertEqual(list(Post.all_objects.all()), [self.other_post])
+        self.assertFalse(Comment.all_objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(Notification.objects.exists())
+        self.assertFalse(ArchivedPost.objects.exists())
+        self.assertFalse(AccountDeletion.objects.exists())
+
+    def test_interrupted_deletion_resumes(self):
+        """Прерванное удаление продолжается повторным запуском."""
+        deletion.request_deletion(self.user)
+        account_deletion = AccountDeletion.objects.get()
+        _, delete_posts = deletion.STEPS[0]
+        delete_posts(self.user, 2)
+        self.assertFalse(Post.all_objects.filter(author=self.user).exists())
+        self.assertEqual(deletion.run(), 1)
+        self.assertFalse(User.objects.filter(pk=account_deletion.user_id)
+                         .exists())
+
+    def test_admin_delete_queues_account(self):
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        self.client.force_login(admin)
+        response = self.client.post(
+            reverse('admin:auth_user_delete', args=[self.user.pk]),
+            {'post': 'yes'})
+        self.assertEqual(response.status_code, 302)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertEqual(Post.objects.filter(author=self.user).count(), 3)
@@ -23,6 +23,10 @@ urlpatterns = [
         'signup/',
         views.SignUp.as_view(),
         name='signup'),
+    path(
+        'delete/',
+        views.delete_account,
+        name='delete_account'),
     path('password_reset/', PasswordResetView.as_view(
         template_name='users/password_reset_form.html',
         success_url=reverse_lazy('users:password_reset_done')),
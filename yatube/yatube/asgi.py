@@ -0,0 +1,13 @@
+import os
+
+from core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+application = get_asgi_application()
+
+from posts import view_counter  # noqa: E402
+from posts.warmup import warm_on_start  # noqa: E402
+
+view_counter.start_flushing()
+warm_on_start()
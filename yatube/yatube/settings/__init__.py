@@ -0,0 +1,14 @@
+import os
+
+# Профиль настроек выбирается переменной окружения YATUBE_ENV:
+# dev (по умолчанию), test или prod
+PROFILE = os.environ.get('YATUBE_ENV', 'dev')
+
+if PROFILE == 'prod':
+    from .prod import *  # noqa: F401,F403
+elif PROFILE == 'test':
+    from .test import *  # noqa: F401,F403
+elif PROFILE == 'dev':
+    from .dev import *  # noqa: F401,F403
+else:
+    raise ImportError(f'Неизвестный профиль настроек YATUBE_ENV={PROFILE}')
@@ -0,0 +1,234 @@
+import os
+
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SECRET_KEY = 'an7qxhvd0pw8v_ri+b5!=k61z^+mk0t4lycfq=p2#@ry5dris7'
+
+DEBUG = False
+
+ALLOWED_HOSTS = [
+    'www.f0670258.cp.sprinthost.ru',
+    'f0670258.cp.sprinthost.ru',
+]
+
+
+INSTALLED_APPS = [
+    'posts.apps.PostsConfig',
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'users.apps.UsersConfig',
+    'core.apps.CoreConfig',
+    'about.apps.AboutConfig',
+    'sorl.thumbnail'
+]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'yatube.urls'
+
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+# Компилировать шаблоны проекта при старте (только с cached.Loader)
+TEMPLATES_PRECOMPILE = False
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [os.path.join(BASE_DIR, 'templates')],
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'core.context_processors.year.year',
+                'posts.context_processors.unread_notifications',
+            ],
+            'loaders': TEMPLATE_LOADERS,
+        },
+    },
+]
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+# Точка входа ASGI: yatube.asgi.application. Django 2.2 выполняет view
+# синхронно, поэтому запросы обрабатываются в пуле из ASGI_THREADS потоков
+ASGI_THREADS = 8
+# Отдельный пул для чтения потоковых ответов (ленты событий и т. п.):
+# потоки в нём в основном ждут событий, поэтому их много
+ASGI_STREAM_THREADS = 64
+
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+    }
+}
+
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+
+STATIC_URL = '/static/'
+STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+
+LOGIN_URL = 'users:login'
+LOGIN_REDIRECT_URL = 'posts:index'
+# LOGOUT_REDIRECT_URL = 'posts:index'
+
+# Письма сохраняются в очередь (core.OutboxEmail), а отправляет их
+# команда send_queued_mail через EMAIL_OUTBOX_BACKEND: пачками по одному
+# соединению, с повторами через EMAIL_OUTBOX_RETRY_DELAY * 2**n секунд.
+# Команду можно запускать в нескольких процессах: пачка забирается на
+# EMAIL_OUTBOX_CLAIM секунд, а после сбоя обработчика уходит повторно
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
+EMAIL_OUTBOX_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_OUTBOX_BATCH_SIZE = 100
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 60
+EMAIL_OUTBOX_CLAIM = 600
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+
+CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Загруженные картинки приложение отдаёт само, только если SERVE_MEDIA;
+# иначе MEDIA_ROOT по адресу MEDIA_URL должен отдавать веб-сервер
+SERVE_MEDIA = False
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Буферизованный приём комментариев: запросы пишут в очередь на диске,
+# а команда drain_comments переносит её в базу через bulk_create
+COMMENTS_BUFFERED = False
+COMMENT_QUEUE_DIR = os.path.join(BASE_DIR, 'queue')
+COMMENT_QUEUE_BATCH_SIZE = 500
+
+# Просмотры постов копятся в памяти процесса и записываются в базу
+# не чаще, чем раз в указанное число секунд
+POST_VIEWS_FLUSH_INTERVAL = 10
+
+# Лента популярных постов: вес комментария и нового подписчика автора,
+# период полураспада очков в секундах и размер хранимого топа
+TRENDING_COMMENT_WEIGHT = 1
+TRENDING_FOLLOW_WEIGHT = 3
+TRENDING_HALF_LIFE = 6 * 60 * 60
+TRENDING_SIZE = 100
+
+# Ограничение частоты запросов: view -> (число запросов, период в секундах)
+RATELIMIT_ENABLED = True
+RATELIMITS = {
+    'post_create': (10, 60),
+    'add_comment': (20, 60),
+    'profile_follow': (30, 60),
+}
+
+# Уведомления подписчикам о новых постах: размер пачки для рассылки
+# (команда notify_followers) и для писем-дайджестов
+NOTIFICATIONS_BATCH_SIZE = 1000
+# Адрес сайта для ссылок в письмах
+SITE_URL = 'http://127.0.0.1:8000'
+
+# Живая лента (SSE): как долго держится одно соединение, интервал пинга,
+# пауза перед переподключением. Таблицу постов опрашивает один поток на
+# процесс раз в LIVE_POLL_INTERVAL секунд и хранит последние
+# LIVE_BUFFER_SIZE событий. Каждое соединение держит поток: под WSGI это
+# поток воркера, поэтому соединений не больше LIVE_MAX_STREAMS; под ASGI
+# это пул ASGI_STREAM_THREADS, и предел LIVE_MAX_STREAMS_ASGI оставляет
+# в нём место другим потоковым ответам. Лишние клиенты переподключаются
+# через LIVE_BUSY_RETRY секунд
+LIVE_STREAM_TIMEOUT = 60
+LIVE_HEARTBEAT = 15
+LIVE_RETRY = 3
+LIVE_POLL_INTERVAL = 2
+LIVE_BUFFER_SIZE = 1000
+LIVE_MAX_STREAMS = 2
+LIVE_MAX_STREAMS_ASGI = ASGI_STREAM_THREADS - 8
+LIVE_BUSY_RETRY = 60
+
+# Сжатие HTML-ответов: уровни gzip (1-9) и brotli (0-11), а также
+# минимальный размер ответа в байтах, который имеет смысл сжимать
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 4
+COMPRESSION_MIN_SIZE = 200
+
+# Архив: посты старше ARCHIVE_AFTER_DAYS дней вместе с комментариями
+# команда archive_posts переносит в архивные таблицы пачками
+ARCHIVE_AFTER_DAYS = 365
+ARCHIVE_BATCH_SIZE = 500
+
+# Удалённые посты и комментарии только помечаются; команда purge_deleted
+# убирает их и зависимые строки пачками такого размера
+PURGE_BATCH_SIZE = 500
+
+# Первая страница ленты подписок хранится в кеше для каждого
+# пользователя; срок жизни ограничивает устаревание после правок групп
+FOLLOW_FEED_TTL = 600
+
+# Защита от одновременного пересчёта горячих ключей (core.cache):
+# сколько секунд хранить устаревшее значение, срок блокировки
+# пересчёта, сколько ждать чужого расчёта при пустом кеше и
+# коэффициент досрочного обновления (0 — только по сроку)
+CACHE_STALE_TTL = 60
+CACHE_LOCK_TIMEOUT = 10
+# Файлы flock для атомарных операций с кешем между процессами
+CACHE_LOCK_DIR = os.path.join(BASE_DIR, 'locks')
+CACHE_LOCK_STRIPES = 64
+CACHE_LOCK_WAIT = 2
+CACHE_EARLY_REFRESH_BETA = 1.0
+
+# Прогрев кеша (команда warm_cache): сколько первых страниц лент,
+# групп и профилей запрашивать, сколько самых просматриваемых постов
+# готовить и в сколько потоков. CACHE_WARM_ON_START запускает прогрев
+# в фоне при старте каждого WSGI/ASGI-процесса — для LocMemCache, у
+# которого кеш свой у каждого воркера
+CACHE_WARM_PAGES = 3
+CACHE_WARM_GROUPS = 10
+CACHE_WARM_PROFILES = 10
+CACHE_WARM_POSTS = 50
+CACHE_WARM_THREADS = 4
+CACHE_WARM_ON_START = False
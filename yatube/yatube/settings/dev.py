@@ -0,0 +1,4 @@
+from .base import *  # noqa: F401,F403
+
+DEBUG = True
+SERVE_MEDIA = True
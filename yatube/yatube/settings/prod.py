@@ -0,0 +1,83 @@
+import os
+
+from .base import *  # noqa: F401,F403
+from .base import (ALLOWED_HOSTS, BASE_DIR, MIDDLEWARE, TEMPLATE_LOADERS,
+                   TEMPLATES)
+
+DEBUG = False
+
+SECRET_KEY = os.environ['SECRET_KEY']
+
+if os.environ.get('ALLOWED_HOSTS'):
+    ALLOWED_HOSTS = os.environ['ALLOWED_HOSTS'].split(',')
+
+# Шаблоны разбираются один раз на процесс и заранее, при старте
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+]
+TEMPLATES_PRECOMPILE = True
+
+# Соединение с базой не открывается заново на каждый запрос
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 600,
+    }
+}
+
+# Кеш, общий для всех процессов-воркеров на сервере.
+# В кеше лежат фрагменты лент, страницы подписок, счётчики ограничения
+# запросов, миниатюры sorl и служебные ключи, поэтому стандартных 300
+# записей не хватает: кеш постоянно вычищался бы случайным образом.
+# FileBasedCache перечисляет каталог при каждой записи, так что предел
+# держим в десятках тысяч файлов; при переполнении удаляется четверть
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get(
+            'YATUBE_CACHE_DIR', os.path.join(BASE_DIR, 'cache')),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(
+                os.environ.get('YATUBE_CACHE_MAX_ENTRIES', 20000)),
+            'CULL_FREQUENCY': 4,
+        },
+    }
+}
+# Кеш общий, поэтому достаточно команды warm_cache при выкладке;
+# YATUBE_WARM_CACHE=1 прогревает его ещё и при старте каждого воркера
+CACHE_WARM_ON_START = os.environ.get('YATUBE_WARM_CACHE') == '1'
+
+STATIC_ROOT = os.environ.get(
+    'YATUBE_STATIC_ROOT', os.path.join(BASE_DIR, 'static_root'))
+# Имена файлов статики с хешем содержимого и сжатые копии .gz/.br;
+# требует collectstatic. YATUBE_STATIC_MANIFEST=0 отключает манифест,
+# если статика не собрана
+if os.environ.get('YATUBE_STATIC_MANIFEST', '1') == '1':
+    STATICFILES_STORAGE = (
+        'core.staticfiles.CompressedManifestStaticFilesStorage')
+
+# Собранная статика отдаётся самим приложением с долгим кешированием
+MIDDLEWARE = [
+    MIDDLEWARE[0],
+    'core.middleware.StaticFilesMiddleware',
+    *MIDDLEWARE[1:],
+]
+
+# Загруженные картинки: при DEBUG = False Django их не отдаёт, поэтому
+# MEDIA_ROOT по адресу MEDIA_URL должен отдавать веб-сервер перед
+# приложением. Без него YATUBE_SERVE_MEDIA=1 включает отдачу через
+# django.views.static.serve — медленно, но картинки не пропадут
+SERVE_MEDIA = os.environ.get('YATUBE_SERVE_MEDIA') == '1'
+
+SITE_URL = os.environ.get('SITE_URL', 'http://127.0.0.1:8000')
+
+# Письма из очереди уходят через SMTP, если задан EMAIL_HOST
+if os.environ.get('EMAIL_HOST'):
+    EMAIL_OUTBOX_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+    EMAIL_HOST = os.environ['EMAIL_HOST']
+    EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 25))
+    EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+    EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+    EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS') == '1'
+    EMAIL_TIMEOUT = 10
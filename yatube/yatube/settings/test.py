@@ -0,0 +1,20 @@
+from .base import *  # noqa: F401,F403
+from .base import TEMPLATE_LOADERS, TEMPLATES
+
+ALLOWED_HOSTS = ['testserver', 'localhost']
+
+# Хеширование паролей в тестах не должно быть медленным
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+# Шаблоны разбираются один раз на весь прогон, а не на каждый запрос
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+]
+
+# Картинки и миниатюры хранятся в памяти, временный MEDIA_ROOT не нужен
+DEFAULT_FILE_STORAGE = 'core.storage.InMemoryStorage'
+THUMBNAIL_STORAGE = DEFAULT_FILE_STORAGE
+
+# Тесты по умолчанию идут в нескольких процессах, по одному на ядро;
+# каждый процесс получает свою копию тестовой базы SQLite
+TEST_RUNNER = 'core.test_runner.ParallelDiscoverRunner'
@@ -1,9 +1,11 @@
+import re
+
 from django.contrib import admin
 
-from django.urls import include, path
+from django.urls import include, path, re_path
 
 from django.conf import settings
-from django.conf.urls.static import static
+from django.views.static import serve
 
 
 urlpatterns = [
@@ -19,7 +21,13 @@ handler403 = 'core.views.csrf_failure'
 handler500 = 'core.views.internal_server_error'
 
 
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )
+# static() работает только при DEBUG, поэтому маршрут задан явно:
+# в проде картинки может отдавать приложение (см. SERVE_MEDIA)
+if settings.SERVE_MEDIA:
+    urlpatterns += [
+        re_path(
+            r'^{}(?P<path>.*)$'.format(
+                re.escape(settings.MEDIA_URL.lstrip('/'))),
+            serve, {'document_root': settings.MEDIA_ROOT},
+        ),
+    ]
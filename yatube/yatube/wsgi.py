@@ -5,3 +5,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+from posts import view_counter  # noqa: E402
+from posts.warmup import warm_on_start  # noqa: E402
+
+view_counter.start_flushing()
+warm_on_start()